@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+# Precomputed attack tables, indexed [row][col] -> list of (row, col) squares.
+# Row 0 is rank 8, matching Board.board.
+
+Square = tuple[int, int]  # (row, col)
+
+KNIGHT_DIRECTIONS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+KING_DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ORTHOGONAL_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+DIAGONAL_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def _in_bounds(r: int, c: int) -> bool:
+    return 0 <= r < 8 and 0 <= c < 8
+
+
+def _jump_table(directions) -> list[list[list[Square]]]:
+    return [[[(r + dr, c + dc) for dr, dc in directions if _in_bounds(r + dr, c + dc)]
+             for c in range(8)] for r in range(8)]
+
+
+def _ray_table(directions) -> list[list[list[list[Square]]]]:
+    # for each square, one list of squares per direction, ordered outward
+    table = []
+    for r in range(8):
+        row = []
+        for c in range(8):
+            rays = []
+            for dr, dc in directions:
+                ray = []
+                rr, cc = r + dr, c + dc
+                while _in_bounds(rr, cc):
+                    ray.append((rr, cc))
+                    rr += dr
+                    cc += dc
+                rays.append(ray)
+            row.append(rays)
+        table.append(row)
+    return table
+
+
+KNIGHT_ATTACKS = _jump_table(KNIGHT_DIRECTIONS)
+KING_ATTACKS = _jump_table(KING_DIRECTIONS)
+
+# squares attacked by a pawn of the given colour standing on [row][col]
+WHITE_PAWN_ATTACKS = _jump_table([(-1, -1), (-1, 1)])
+BLACK_PAWN_ATTACKS = _jump_table([(1, -1), (1, 1)])
+
+ORTHOGONAL_RAYS = _ray_table(ORTHOGONAL_DIRECTIONS)
+DIAGONAL_RAYS = _ray_table(DIAGONAL_DIRECTIONS)
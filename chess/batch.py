@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import islice
+
+from chess.evaluation import MG_BY_INDEX, EG_BY_INDEX, PHASE_BY_INDEX, MAX_PHASE
+from chess.move import PIECE_SYMBOLS
+
+try:
+    import numpy as np
+except ImportError:  # optional: only this module needs it
+    np = None
+
+# Batched FEN decoding and evaluation with NumPy, for scoring large numbers of positions without
+# building a Board for each one.
+#
+# Each placement field is expanded to 64 bytes (a8 .. h1, '.' for empty squares) in pure string
+# operations, the whole batch is viewed as one (N, 64) byte array, and everything after that
+# (piece planes, en passant capturability, material and piece-square scores) is vectorized.
+#
+# Plane order is chess.move.PIECE_SYMBOLS ("PNBRQKpnbrqk"); planes[n, p, row, col] uses the
+# board's row 0 = rank 8 layout.
+
+EMPTY_INDEX = len(PIECE_SYMBOLS)  # piece index used for empty squares in the (N, 64) index array
+
+# "3p4/..." -> "...p....": digits become runs of dots, rank separators disappear
+_EXPAND = {ord(str(n)): '.' * n for n in range(1, 9)}
+_EXPAND[ord('/')] = None
+
+CASTLING_LETTERS = "KQkq"
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("chess.batch needs numpy; install it with `pip install numpy`")
+
+
+_tables = None
+
+
+def _lookup_tables():
+    # built on first use so importing this module never needs numpy
+    global _tables
+    if _tables is None:
+        codes = np.full(256, 255, dtype=np.uint8)
+        codes[ord('.')] = EMPTY_INDEX
+        for i, symbol in enumerate(PIECE_SYMBOLS):
+            codes[ord(symbol)] = i
+        # one extra all-zero row for empty squares
+        mg = np.zeros((EMPTY_INDEX + 1, 64), dtype=np.int32)
+        eg = np.zeros((EMPTY_INDEX + 1, 64), dtype=np.int32)
+        phase = np.zeros(EMPTY_INDEX + 1, dtype=np.int32)
+        mg[:EMPTY_INDEX] = MG_BY_INDEX
+        eg[:EMPTY_INDEX] = EG_BY_INDEX
+        phase[:EMPTY_INDEX] = PHASE_BY_INDEX
+        _tables = codes, mg, eg, phase
+    return _tables
+
+
+@dataclass
+class PositionBatch:
+    """N decoded positions as arrays.
+
+    pieces:        (N, 64) uint8 piece index per square (PIECE_SYMBOLS order, EMPTY_INDEX if empty)
+    white_to_move: (N,) bool
+    castling:      (N, 4) uint8 rights in KQkq order
+    ep_file:       (N,) int8 en passant file, -1 when there is none or no pawn can take
+                   (the same rule as FEN keys and zobrist keys)
+    half_move_clock, full_move_number: (N,) int32
+    """
+    pieces: "np.ndarray"
+    white_to_move: "np.ndarray"
+    castling: "np.ndarray"
+    ep_file: "np.ndarray"
+    half_move_clock: "np.ndarray"
+    full_move_number: "np.ndarray"
+
+    def __len__(self):
+        return len(self.pieces)
+
+    @property
+    def planes(self) -> "np.ndarray":
+        # (N, 12, 8, 8) uint8 one-hot piece planes
+        n = len(self.pieces)
+        planes = np.zeros((n, EMPTY_INDEX + 1, 64), dtype=np.uint8)
+        rows = np.repeat(np.arange(n), 64)
+        planes[rows, self.pieces.ravel(), np.tile(np.arange(64), n)] = 1
+        return planes[:, :EMPTY_INDEX].reshape(n, EMPTY_INDEX, 8, 8)
+
+    def features(self) -> "np.ndarray":
+        # (N, 768 + 1 + 4 + 8) uint8: planes, side to move, castling rights, en passant file one-hot
+        n = len(self.pieces)
+        ep = np.zeros((n, 8), dtype=np.uint8)
+        has_ep = self.ep_file >= 0
+        ep[np.nonzero(has_ep)[0], self.ep_file[has_ep]] = 1
+        return np.concatenate([self.planes.reshape(n, -1),
+                               self.white_to_move[:, None].astype(np.uint8),
+                               self.castling, ep], axis=1)
+
+
+def _drop_uncapturable_ep(pieces, white_to_move, ep_file):
+    # keep the en passant file only if a pawn of the side to move stands beside the double-pushed
+    # pawn (white takes from row 3, black from row 4); ep_file is updated in place
+    candidates = np.nonzero(ep_file >= 0)[0]
+    if not len(candidates):
+        return
+    files = ep_file[candidates].astype(np.int64)
+    white = white_to_move[candidates]
+    row = np.where(white, 3, 4)
+    pawn = np.where(white, PIECE_SYMBOLS.index('P'), PIECE_SYMBOLS.index('p'))
+    capturable = np.zeros(len(candidates), dtype=bool)
+    for side in (-1, 1):
+        col = files + side
+        on_board = (col >= 0) & (col < 8)
+        sq = row * 8 + np.clip(col, 0, 7)
+        capturable |= on_board & (pieces[candidates, sq] == pawn)
+    ep_file[candidates[~capturable]] = -1
+
+
+def decode_fens(fens) -> PositionBatch:
+    """Decode a sequence of FEN strings into a PositionBatch. Raises ValueError on a malformed FEN."""
+    _require_numpy()
+    codes, _, _, _ = _lookup_tables()
+    fens = list(fens)
+    n = len(fens)
+
+    placements = []
+    white_to_move = np.empty(n, dtype=bool)
+    castling = np.zeros((n, 4), dtype=np.uint8)
+    ep_file = np.full(n, -1, dtype=np.int8)
+    half = np.empty(n, dtype=np.int32)
+    full = np.empty(n, dtype=np.int32)
+    for i, fen in enumerate(fens):
+        fields = fen.split()
+        if len(fields) != 6:
+            raise ValueError(f"FEN {i} must have 6 fields: {fen!r}")
+        placement, active, rights, ep, half_moves, full_moves = fields
+        half[i] = int(half_moves)
+        full[i] = int(full_moves)
+        squares = placement.translate(_EXPAND)
+        if len(squares) != 64:
+            raise ValueError(f"FEN {i} does not describe 64 squares: {fen!r}")
+        placements.append(squares)
+        white_to_move[i] = active == "w"
+        for j, letter in enumerate(CASTLING_LETTERS):
+            if letter in rights:
+                castling[i, j] = 1
+        if ep != "-":
+            ep_file[i] = ord(ep[0]) - ord('a')
+
+    raw = np.frombuffer("".join(placements).encode("ascii"), dtype=np.uint8).reshape(n, 64)
+    pieces = codes[raw]
+    if (pieces == 255).any():
+        bad = int(np.nonzero((pieces == 255).any(axis=1))[0][0])
+        raise ValueError(f"FEN {bad} has an unknown piece symbol: {fens[bad]!r}")
+
+    _drop_uncapturable_ep(pieces, white_to_move, ep_file)
+    return PositionBatch(pieces, white_to_move, castling, ep_file, half, full)
+
+
+def iter_batches(fens, batch_size: int = 65536):
+    # decode a stream of FEN lines (an open file works) in fixed-size PositionBatch chunks
+    fens = (line.strip() for line in fens)
+    fens = (fen for fen in fens if fen)
+    while True:
+        chunk = list(islice(fens, batch_size))
+        if not chunk:
+            return
+        yield decode_fens(chunk)
+
+
+def scores(batch: PositionBatch):
+    """(mg, eg, phase) int32 arrays, as chess.evaluation.compute_scores for each position."""
+    _require_numpy()
+    _, mg_table, eg_table, phase_table = _lookup_tables()
+    squares = np.arange(64)
+    mg = mg_table[batch.pieces, squares].sum(axis=1, dtype=np.int32)
+    eg = eg_table[batch.pieces, squares].sum(axis=1, dtype=np.int32)
+    phase = phase_table[batch.pieces].sum(axis=1, dtype=np.int32)
+    return mg, eg, phase
+
+
+def evaluate(batch: PositionBatch) -> "np.ndarray":
+    """Tapered evaluation of every position, from the side to move's point of view.
+
+    Matches chess.evaluation.evaluate (and Board.evaluate) position for position.
+    """
+    mg, eg, phase = scores(batch)
+    phase = np.minimum(phase, MAX_PHASE).astype(np.int64)
+    total = mg.astype(np.int64) * phase + eg.astype(np.int64) * (MAX_PHASE - phase)
+    score = np.sign(total) * (np.abs(total) // MAX_PHASE)  # truncate toward zero, as blend()
+    return np.where(batch.white_to_move, score, -score).astype(np.int32)
+
+
+def evaluate_fens(fens, batch_size: int = 65536) -> "np.ndarray":
+    # evaluate a list or stream of FENs in chunks and return one array of scores
+    _require_numpy()
+    results = [evaluate(batch) for batch in iter_batches(fens, batch_size)]
+    return np.concatenate(results) if results else np.zeros(0, dtype=np.int32)
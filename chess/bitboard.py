@@ -0,0 +1,743 @@
+from __future__ import annotations
+
+from collections import Counter
+
+from chess.fen import parse_placement, alg_to_rc
+from chess.perft import perft as run_perft, divide as run_divide
+from chess.packed import to_packed, unpack_fen, reduce_board
+from chess.status import compute_status
+from chess.move import (PIECE_SYMBOLS, encode_move, decode_move, TO_SHIFT, PROMOTION_SHIFT, PIECE_SHIFT, SQUARE_MASK,
+                        PROMOTION_MASK, CAPTURE, DOUBLE_PUSH, EN_PASSANT, CASTLE_KS, CASTLE_QS)
+from chess import evaluation
+from chess.evaluation import MG_BY_INDEX, EG_BY_INDEX, PHASE_BY_INDEX, blend
+from chess.zobrist import PIECE_KEYS, SIDE_KEY, CASTLE_KEYS, EP_KEYS, CASTLE_K, CASTLE_Q, CASTLE_k, CASTLE_q
+
+# Bitboard backend: 12 piece bitboards plus per-colour occupancy, behind the same surface as
+# chess.board.Board (make_move / unmake_move / legal_moves / check / FEN via chess.fen).
+#
+# Square index is row * 8 + col with row 0 = rank 8, so a8 = 0 and h1 = 63, as in chess.zobrist.
+
+Square = tuple[int, int]  # (row, col)
+
+SYMBOLS = PIECE_SYMBOLS  # piece index -> FEN symbol; white 0-5, black 6-11
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+BLACK = 6
+
+ALL_SQUARES = (1 << 64) - 1
+
+RC = [(sq // 8, sq % 8) for sq in range(64)]  # square index -> (row, col)
+
+
+def _sq(r: int, c: int) -> int:
+    return r * 8 + c
+
+
+def _lsb(bb: int) -> int:
+    return (bb & -bb).bit_length() - 1
+
+
+def _jump_table(directions) -> list[int]:
+    table = []
+    for sq in range(64):
+        r, c = RC[sq]
+        bb = 0
+        for dr, dc in directions:
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8:
+                bb |= 1 << _sq(r + dr, c + dc)
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _jump_table([(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_ATTACKS = _jump_table([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+PAWN_ATTACKS = [_jump_table([(-1, -1), (-1, 1)]),  # white pawns capture towards row 0
+                _jump_table([(1, -1), (1, 1)])]
+
+# Rays for the classical sliding-attack scheme: the nearest blocker along a ray is its lowest set
+# bit when the direction increases the square index, its highest set bit otherwise. The ray behind
+# the blocker is then cut off with one XOR.
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1),  # increasing index
+              (0, -1), (-1, 0), (-1, -1), (-1, 1)]  # decreasing index
+
+
+def _ray_tables() -> list[list[int]]:
+    tables = []
+    for dr, dc in DIRECTIONS:
+        table = []
+        for sq in range(64):
+            r, c = RC[sq]
+            bb = 0
+            r, c = r + dr, c + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << _sq(r, c)
+                r, c = r + dr, c + dc
+            table.append(bb)
+        tables.append(table)
+    return tables
+
+
+RAYS = _ray_tables()
+ROOK_RAYS = [RAYS[0][sq] | RAYS[1][sq] | RAYS[4][sq] | RAYS[5][sq] for sq in range(64)]
+BISHOP_RAYS = [RAYS[2][sq] | RAYS[3][sq] | RAYS[6][sq] | RAYS[7][sq] for sq in range(64)]
+
+
+def _between_table() -> list[list[int]]:
+    # squares strictly between two squares on a common line, else 0
+    table = [[0] * 64 for _ in range(64)]
+    for d in range(8):
+        opposite = (d + 4) % 8
+        for a in range(64):
+            ray = RAYS[d][a]
+            while ray:
+                b = _lsb(ray)
+                ray &= ray - 1
+                table[a][b] = RAYS[d][a] & RAYS[opposite][b]
+    return table
+
+
+BETWEEN = _between_table()
+
+
+def rook_attacks(sq: int, occ: int) -> int:
+    attacks = 0
+    ray = RAYS[0][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[0][_lsb(blockers)]
+    attacks |= ray
+    ray = RAYS[1][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[1][_lsb(blockers)]
+    attacks |= ray
+    ray = RAYS[4][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[4][blockers.bit_length() - 1]
+    attacks |= ray
+    ray = RAYS[5][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[5][blockers.bit_length() - 1]
+    return attacks | ray
+
+
+def bishop_attacks(sq: int, occ: int) -> int:
+    attacks = 0
+    ray = RAYS[2][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[2][_lsb(blockers)]
+    attacks |= ray
+    ray = RAYS[3][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[3][_lsb(blockers)]
+    attacks |= ray
+    ray = RAYS[6][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[6][blockers.bit_length() - 1]
+    attacks |= ray
+    ray = RAYS[7][sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAYS[7][blockers.bit_length() - 1]
+    return attacks | ray
+
+
+# Castling: (right bit, king from, king to, rook from, rook to, squares that must be empty,
+# squares the king must not be attacked on)
+E1, E8 = _sq(7, 4), _sq(0, 4)
+CASTLES = {
+    True: ((CASTLE_K, E1, E1 + 2, E1 + 3, E1 + 1, [E1 + 1, E1 + 2], [E1, E1 + 1, E1 + 2]),
+           (CASTLE_Q, E1, E1 - 2, E1 - 4, E1 - 1, [E1 - 1, E1 - 2, E1 - 3], [E1, E1 - 1, E1 - 2])),
+    False: ((CASTLE_k, E8, E8 + 2, E8 + 3, E8 + 1, [E8 + 1, E8 + 2], [E8, E8 + 1, E8 + 2]),
+            (CASTLE_q, E8, E8 - 2, E8 - 4, E8 - 1, [E8 - 1, E8 - 2, E8 - 3], [E8, E8 - 1, E8 - 2])),
+}
+
+# rights that survive a move touching each square (king and rook home squares clear theirs)
+CASTLE_KEEP = [0b1111] * 64
+CASTLE_KEEP[E1] &= ~(CASTLE_K | CASTLE_Q)
+CASTLE_KEEP[E1 + 3] &= ~CASTLE_K
+CASTLE_KEEP[E1 - 4] &= ~CASTLE_Q
+CASTLE_KEEP[E8] &= ~(CASTLE_k | CASTLE_q)
+CASTLE_KEEP[E8 + 3] &= ~CASTLE_k
+CASTLE_KEEP[E8 - 4] &= ~CASTLE_q
+
+
+class PieceView:
+    # What get_piece returns: the symbol/colour surface that fen.py, san.py and game.py read
+    __slots__ = ("symbol", "white")
+
+    def __init__(self, symbol, white):
+        self.symbol = symbol
+        self.white = white
+
+    def __repr__(self):
+        return f"PieceView({self.symbol!r})"
+
+
+PIECE_VIEWS = [PieceView(sym, sym.isupper()) for sym in SYMBOLS]
+
+
+class BitboardBoard:
+    backend = "bitboard"
+    # captures=True restricts the generator's target masks, so the quiet moves cost nothing until asked for
+    LAZY_CAPTURES = True
+
+    def __init__(self):
+        self.WIDTH = self.HEIGHT = 8
+        self.set_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+
+    # --- setup -------------------------------------------------------------------------------
+
+    def set_fen(self, fen: str) -> None:
+        # called by fen.from_fen; replaces the whole position and restarts history
+        fields = fen.strip().split()
+        if len(fields) != 6:
+            raise ValueError("FEN must have 6 fields")
+        placement, active, castling, ep, half, full = fields
+
+        self.bb = [0] * 12
+        self.occ = [0, 0]  # white, black
+        self.squares = [None] * 64  # square index -> piece index
+        for (r, c), sym in parse_placement(placement):
+            self._put(SYMBOLS.index(sym), _sq(r, c))
+
+        self.white_to_move = (active == "w")
+
+        # only keep rights whose king and rook are still on their home squares
+        mask = 0
+        for ch, bit, king, rook, king_sq, rook_sq in (('K', CASTLE_K, KING, ROOK, E1, E1 + 3),
+                                                      ('Q', CASTLE_Q, KING, ROOK, E1, E1 - 4),
+                                                      ('k', CASTLE_k, KING + BLACK, ROOK + BLACK, E8, E8 + 3),
+                                                      ('q', CASTLE_q, KING + BLACK, ROOK + BLACK, E8, E8 - 4)):
+            if ch in castling and self.squares[king_sq] == king and self.squares[rook_sq] == rook:
+                mask |= bit
+        self.castling_mask = mask
+
+        self.ep_square = None if ep == "-" else alg_to_rc(ep)
+        self.half_move_clock = int(half)
+        self.full_move_number = int(full)
+
+        self.history = []  # list of Move objects
+        self._status = None  # chess.status.GameStatus of this position, see status()
+        self._undo_stack = []
+        self.zobrist_key = self._compute_key()
+        self.mg_score, self.eg_score, self.phase = self._compute_scores()
+        self._pos_counts = Counter({self.zobrist_key: 1})
+        self._pos_history = [self.zobrist_key]
+
+    def _put(self, piece, sq):
+        bit = 1 << sq
+        self.bb[piece] |= bit
+        self.occ[piece >= BLACK] |= bit
+        self.squares[sq] = piece
+
+    def _remove(self, piece, sq):
+        bit = 1 << sq
+        self.bb[piece] ^= bit
+        self.occ[piece >= BLACK] ^= bit
+        self.squares[sq] = None
+
+    def _ep_file(self) -> int | None:
+        # en-passant file only when the side to move has a pawn that can take (fen_key semantics)
+        if self.ep_square is None:
+            return None
+        r, c = self.ep_square
+        pawns = self.bb[PAWN] if self.white_to_move else self.bb[PAWN + BLACK]
+        if PAWN_ATTACKS[1 if self.white_to_move else 0][_sq(r, c)] & pawns:
+            return c
+        return None
+
+    def _compute_key(self) -> int:
+        key = 0
+        for sq, piece in enumerate(self.squares):
+            if piece is not None:
+                key ^= PIECE_KEYS[SYMBOLS[piece]][sq]
+        if not self.white_to_move:
+            key ^= SIDE_KEY
+        key ^= CASTLE_KEYS[self.castling_mask]
+        f = self._ep_file()
+        if f is not None:
+            key ^= EP_KEYS[f]
+        return key
+
+    def _compute_scores(self) -> tuple[int, int, int]:
+        mg = eg = phase = 0
+        for sq, piece in enumerate(self.squares):
+            if piece is not None:
+                mg += MG_BY_INDEX[piece][sq]
+                eg += EG_BY_INDEX[piece][sq]
+                phase += PHASE_BY_INDEX[piece]
+        return mg, eg, phase
+
+    # --- Board surface -----------------------------------------------------------------------
+
+    def in_bounds(self, square: Square) -> bool:
+        row, col = square
+        return 0 <= row < 8 and 0 <= col < 8
+
+    def get_piece(self, square) -> PieceView | None:
+        row, col = square
+        piece = self.squares[row * 8 + col]
+        return None if piece is None else PIECE_VIEWS[piece]
+
+    def is_empty(self, square: Square) -> bool:
+        row, col = square
+        return self.squares[row * 8 + col] is None
+
+    def get_king(self, white) -> Square:
+        return RC[_lsb(self.bb[KING if white else KING + BLACK])]
+
+    def attackers(self, sq: int, by_white: bool, occ: int) -> int:
+        # bitboard of pieces of the given colour attacking square index `sq` through occupancy `occ`
+        bb = self.bb
+        o = 0 if by_white else BLACK
+        queens = bb[o + QUEEN]
+        # pawns of a colour attacking sq stand where the other colour's pawn on sq would attack
+        return ((KNIGHT_ATTACKS[sq] & bb[o + KNIGHT])
+                | (PAWN_ATTACKS[by_white][sq] & bb[o + PAWN])
+                | (KING_ATTACKS[sq] & bb[o + KING])
+                | (rook_attacks(sq, occ) & (bb[o + ROOK] | queens))
+                | (bishop_attacks(sq, occ) & (bb[o + BISHOP] | queens)))
+
+    def _attacked(self, sq: int, by_white: bool, occ: int) -> bool:
+        bb = self.bb
+        o = 0 if by_white else BLACK
+        if KNIGHT_ATTACKS[sq] & bb[o + KNIGHT]:
+            return True
+        if PAWN_ATTACKS[by_white][sq] & bb[o + PAWN]:
+            return True
+        if KING_ATTACKS[sq] & bb[o + KING]:
+            return True
+        queens = bb[o + QUEEN]
+        rooks = bb[o + ROOK] | queens
+        if rooks and rook_attacks(sq, occ) & rooks:
+            return True
+        bishops = bb[o + BISHOP] | queens
+        return bool(bishops and bishop_attacks(sq, occ) & bishops)
+
+    def is_square_attacked(self, square, by_white) -> bool:
+        row, col = square
+        return self._attacked(row * 8 + col, by_white, self.occ[0] | self.occ[1])
+
+    def check(self, check_white_king):
+        ksq = _lsb(self.bb[KING if check_white_king else KING + BLACK])
+        return self._attacked(ksq, not check_white_king, self.occ[0] | self.occ[1])
+
+    # --- make / unmake -----------------------------------------------------------------------
+
+    def make_move(self, move):
+        # accepts a Move or a packed int from chess.move.encode_move / packed_legal_moves
+        if type(move) is int:
+            packed = move
+        else:
+            (sr, sc), (dr, dc) = move.source, move.destination
+            if not (0 <= sr < 8 and 0 <= sc < 8 and 0 <= dr < 8 and 0 <= dc < 8):
+                raise ValueError(f"out of bounds: source={move.source} destination={move.destination}")
+            packed = encode_move(move)
+        src = packed & SQUARE_MASK
+        dst = (packed >> TO_SHIFT) & SQUARE_MASK
+
+        piece = self.squares[src]
+        if piece is None:
+            raise ValueError(f"No piece at {RC[src]}")
+        white = piece < BLACK
+        self._status = None
+
+        captured_sq = dst
+        if packed & EN_PASSANT:
+            captured_sq = (src & 0x38) | (dst & 7)  # source rank, destination file
+        captured = self.squares[captured_sq]
+        if captured is not None and (captured < BLACK) == white:
+            raise ValueError(f"Cannot move onto friendly piece at {RC[dst]}")
+
+        self._undo_stack.append((packed, captured, captured_sq, self.castling_mask, self.ep_square,
+                                 self.half_move_clock, self.full_move_number, self.zobrist_key,
+                                 self.mg_score, self.eg_score, self.phase))
+
+        key = self.zobrist_key ^ SIDE_KEY
+        old_ep_file = self._ep_file()
+        if old_ep_file is not None:
+            key ^= EP_KEYS[old_ep_file]
+
+        # incremental evaluation, see chess.evaluation
+        mg = self.mg_score - MG_BY_INDEX[piece][src]
+        eg = self.eg_score - EG_BY_INDEX[piece][src]
+        phase = self.phase
+
+        if captured is not None:
+            self._remove(captured, captured_sq)
+            key ^= PIECE_KEYS[SYMBOLS[captured]][captured_sq]
+            mg -= MG_BY_INDEX[captured][captured_sq]
+            eg -= EG_BY_INDEX[captured][captured_sq]
+            phase -= PHASE_BY_INDEX[captured]
+
+        self._remove(piece, src)
+        key ^= PIECE_KEYS[SYMBOLS[piece]][src]
+        placed = piece
+        promotion = (packed >> PROMOTION_SHIFT) & PROMOTION_MASK  # 1-4 are KNIGHT..QUEEN
+        if promotion:
+            placed = promotion + (0 if white else BLACK)
+            phase += PHASE_BY_INDEX[placed]
+        self._put(placed, dst)
+        key ^= PIECE_KEYS[SYMBOLS[placed]][dst]
+        mg += MG_BY_INDEX[placed][dst]
+        eg += EG_BY_INDEX[placed][dst]
+
+        if packed & (CASTLE_KS | CASTLE_QS):
+            rook = ROOK if white else ROOK + BLACK
+            rook_src, rook_dst = (src + 3, src + 1) if packed & CASTLE_KS else (src - 4, src - 1)
+            self._remove(rook, rook_src)
+            self._put(rook, rook_dst)
+            key ^= PIECE_KEYS[SYMBOLS[rook]][rook_src] ^ PIECE_KEYS[SYMBOLS[rook]][rook_dst]
+            mg += MG_BY_INDEX[rook][rook_dst] - MG_BY_INDEX[rook][rook_src]
+            eg += EG_BY_INDEX[rook][rook_dst] - EG_BY_INDEX[rook][rook_src]
+
+        self.mg_score, self.eg_score, self.phase = mg, eg, phase
+
+        old_mask = self.castling_mask
+        if old_mask:
+            self.castling_mask = old_mask & CASTLE_KEEP[src] & CASTLE_KEEP[dst]
+            key ^= CASTLE_KEYS[old_mask] ^ CASTLE_KEYS[self.castling_mask]
+
+        self.history.append(move)
+        self.white_to_move = not white
+
+        # en passant target for next move
+        self.ep_square = RC[(src + dst) // 2] if packed & DOUBLE_PUSH else None
+        new_ep_file = self._ep_file()
+        if new_ep_file is not None:
+            key ^= EP_KEYS[new_ep_file]
+
+        # Half move clock (resets on pawn move or capture)
+        if piece % BLACK == PAWN or captured is not None:
+            self.half_move_clock = 0
+        else:
+            self.half_move_clock += 1
+
+        # Full move number increments after Black's move
+        if not white:
+            self.full_move_number += 1
+
+        self.zobrist_key = key
+        self._pos_history.append(key)
+        self._pos_counts[key] += 1
+
+        return None if captured is None else PIECE_VIEWS[captured]
+
+    def unmake_move(self):
+        if len(self.history) == 0:
+            return
+        self._status = None
+
+        last = self._pos_history.pop()
+        self._pos_counts[last] -= 1
+        if self._pos_counts[last] <= 0:
+            del self._pos_counts[last]
+
+        self.history.pop()
+        (packed, captured, captured_sq, self.castling_mask, self.ep_square,
+         self.half_move_clock, self.full_move_number, self.zobrist_key,
+         self.mg_score, self.eg_score, self.phase) = self._undo_stack.pop()
+
+        src = packed & SQUARE_MASK
+        dst = (packed >> TO_SHIFT) & SQUARE_MASK
+        placed = self.squares[dst]
+        white = placed < BLACK
+
+        self._remove(placed, dst)
+        promoted = (packed >> PROMOTION_SHIFT) & PROMOTION_MASK
+        self._put((PAWN if white else PAWN + BLACK) if promoted else placed, src)
+
+        if captured is not None:
+            self._put(captured, captured_sq)
+
+        if packed & (CASTLE_KS | CASTLE_QS):
+            rook = ROOK if white else ROOK + BLACK
+            rook_src, rook_dst = (src + 3, src + 1) if packed & CASTLE_KS else (src - 4, src - 1)
+            self._remove(rook, rook_dst)
+            self._put(rook, rook_src)
+
+        self.white_to_move = white
+
+    def evaluate(self) -> int:
+        # tapered material + piece-square score for the side to move, from the incremental scores
+        if evaluation.DEBUG:
+            evaluation.verify_scores(self)
+        score = blend(self.mg_score, self.eg_score, self.phase)
+        return score if self.white_to_move else -score
+
+    # --- move generation ---------------------------------------------------------------------
+
+    def legal_moves(self, reference=False):
+        """Return the legal moves for the side to move.
+
+        With reference=True pseudo-legal moves are filtered by make/unmake and check, as in
+        Board.legal_moves(reference=True), for cross-checking the pin/check-mask generator.
+        """
+        return [decode_move(packed) for packed in self.packed_legal_moves(reference)]
+
+    def packed_legal_moves(self, reference=False, captures=None):
+        """Legal moves as packed ints (see chess.move), without allocating a Move per move.
+
+        captures=True keeps only captures and promotions, captures=False only the remaining quiet
+        moves (castling included); the default None returns both.
+        """
+        if not reference:
+            return self._generate(legal=True, captures=captures)
+        white = self.white_to_move
+        moves = []
+        for move in self._generate(legal=False, captures=captures):
+            self.make_move(move)
+            if not self.check(white):
+                moves.append(move)
+            self.unmake_move()
+        return moves
+
+    def status(self):
+        # chess.status.GameStatus of this position, cached until the next make_move / unmake_move
+        if self._status is None:
+            self._status = compute_status(self)
+        return self._status
+
+    @property
+    def checkmate(self) -> bool:
+        return self.status().checkmate
+
+    @property
+    def stalemate(self) -> bool:
+        return self.status().stalemate
+
+    def perft(self, depth):
+        # leaf node count of the legal move tree, see chess.perft
+        return run_perft(self, depth)
+
+    def divide(self, depth):
+        # perft split by root move, {uci move: nodes}
+        return run_divide(self, depth)
+
+    def probe_tablebase(self, tablebase):
+        # win/draw/loss and distance to mate from a chess.tablebase.Tablebase, None if not covered
+        return tablebase.probe(self)
+
+    def to_packed(self) -> bytes:
+        return to_packed(self)
+
+    @classmethod
+    def from_packed(cls, data, backend="bitboard"):
+        # same signature as Board.from_packed; this class is always the bitboard backend
+        return cls.from_fen(unpack_fen(data))
+
+    @classmethod
+    def from_fen(cls, fen, backend="bitboard"):
+        board = cls.__new__(cls)
+        board.WIDTH = board.HEIGHT = 8
+        board.set_fen(fen)
+        return board
+
+    def copy(self):
+        # everything below is ints, tuples or moves, so flat copies of the containers will do
+        board = self.__class__.__new__(self.__class__)
+        board.__dict__.update(self.__dict__)
+        board.bb = self.bb[:]
+        board.occ = self.occ[:]
+        board.squares = self.squares[:]
+        board.history = self.history[:]
+        board._undo_stack = self._undo_stack[:]
+        board._pos_counts = Counter(self._pos_counts)
+        board._pos_history = self._pos_history[:]
+        return board
+
+    def __reduce__(self):
+        return reduce_board(self)
+
+    @classmethod
+    def _from_history(cls, fen, moves):
+        board = cls.from_fen(fen)
+        for move in moves:
+            board.make_move(move)
+        return board
+
+    def _generate(self, legal, captures=None):
+        white = self.white_to_move
+        bb = self.bb
+        squares = self.squares
+        us = 0 if white else BLACK
+        them = BLACK - us
+        own = self.occ[0 if white else 1]
+        enemy = self.occ[1 if white else 0]
+        occ = own | enemy
+        ksq = _lsb(bb[us + KING])
+        moves = []
+
+        check_mask = ALL_SQUARES
+        pins = {}
+        checkers = 0
+        if legal:
+            checkers = self.attackers(ksq, not white, occ)
+            if checkers:
+                if checkers & (checkers - 1):
+                    check_mask = 0  # double check: only the king may move
+                else:
+                    check_mask = checkers | BETWEEN[ksq][_lsb(checkers)]
+
+            # pinned pieces: exactly one of our pieces between the king and an enemy slider
+            snipers = ((ROOK_RAYS[ksq] & (bb[them + ROOK] | bb[them + QUEEN]))
+                       | (BISHOP_RAYS[ksq] & (bb[them + BISHOP] | bb[them + QUEEN])))
+            while snipers:
+                s = _lsb(snipers)
+                snipers &= snipers - 1
+                between = BETWEEN[ksq][s] & occ
+                if between and not between & (between - 1) and between & own:
+                    pins[_lsb(between)] = BETWEEN[ksq][s] | (1 << s)
+
+        # king
+        king_bits = ((us + KING) << PIECE_SHIFT) | ksq
+        targets = KING_ATTACKS[ksq] & ~own
+        if captures is not None:
+            targets &= enemy if captures else ~enemy
+        occ_without_king = occ ^ (1 << ksq)
+        while targets:
+            dst = _lsb(targets)
+            targets &= targets - 1
+            if legal and self._attacked(dst, not white, occ_without_king):
+                continue
+            moves.append(king_bits | (dst << TO_SHIFT) | (CAPTURE if squares[dst] is not None else 0))
+
+        if not checkers and captures is not True:
+            for bit, k_from, k_to, r_from, _, empty, safe in CASTLES[white]:
+                if not self.castling_mask & bit or ksq != k_from:
+                    continue
+                if any(squares[sq] is not None for sq in empty):
+                    continue
+                if any(self._attacked(sq, not white, occ) for sq in safe):
+                    continue
+                moves.append(king_bits | (k_to << TO_SHIFT) | (CASTLE_KS if k_to > k_from else CASTLE_QS))
+
+        if not check_mask:
+            return moves
+
+        target_mask = ~own & check_mask
+        piece_mask = target_mask
+        if captures is not None:
+            piece_mask &= enemy if captures else ~enemy
+
+        # knights, bishops, rooks, queens
+        for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+            piece_bits = (us + kind) << PIECE_SHIFT
+            pieces = bb[us + kind]
+            while pieces:
+                src = _lsb(pieces)
+                pieces &= pieces - 1
+                if kind == KNIGHT:
+                    if src in pins:
+                        continue  # a pinned knight can never stay on the pin line
+                    targets = KNIGHT_ATTACKS[src]
+                elif kind == BISHOP:
+                    targets = bishop_attacks(src, occ)
+                elif kind == ROOK:
+                    targets = rook_attacks(src, occ)
+                else:
+                    targets = rook_attacks(src, occ) | bishop_attacks(src, occ)
+                targets &= piece_mask
+                if src in pins:
+                    targets &= pins[src]
+                while targets:
+                    dst = _lsb(targets)
+                    targets &= targets - 1
+                    moves.append(piece_bits | src | (dst << TO_SHIFT)
+                                 | (CAPTURE if squares[dst] is not None else 0))
+
+        # pawns
+        pawn_bits = (us + PAWN) << PIECE_SHIFT
+        step = -8 if white else 8
+        start_row, promotion_row = (6, 0) if white else (1, 7)
+        attacks_table = PAWN_ATTACKS[0 if white else 1]
+        ep_bit = 0
+        if self.ep_square is not None:
+            ep_bit = 1 << _sq(*self.ep_square)
+        pawns = bb[us + PAWN]
+        while pawns:
+            src = _lsb(pawns)
+            pawns &= pawns - 1
+            base = pawn_bits | src
+            allowed = target_mask & pins.get(src, ALL_SQUARES)
+            destinations = []
+
+            one = src + step
+            if squares[one] is None:
+                # a push is quiet unless it promotes
+                if (1 << one) & allowed and (captures is None
+                                             or captures == (one // 8 == promotion_row)):
+                    destinations.append((one, 0))
+                two = one + step
+                if (captures is not True and src // 8 == start_row and squares[two] is None
+                        and (1 << two) & allowed):
+                    moves.append(base | (two << TO_SHIFT) | DOUBLE_PUSH)
+
+            hits = attacks_table[src] & enemy & allowed if captures is not False else 0
+            while hits:
+                dst = _lsb(hits)
+                hits &= hits - 1
+                destinations.append((dst, CAPTURE))
+
+            for dst, capture in destinations:
+                packed = base | (dst << TO_SHIFT) | capture
+                if dst // 8 == promotion_row:
+                    for promo in (QUEEN, ROOK, BISHOP, KNIGHT):  # order as chess.pieces.pawn
+                        moves.append(packed | (promo << PROMOTION_SHIFT))
+                else:
+                    moves.append(packed)
+
+            if attacks_table[src] & ep_bit and captures is not False:
+                dst = ep_bit.bit_length() - 1
+                captured_sq = dst - step
+                if not legal or self._ep_is_legal(src, dst, captured_sq, ksq, check_mask, occ):
+                    moves.append(base | (dst << TO_SHIFT) | CAPTURE | EN_PASSANT)
+
+        return moves
+
+    def _ep_is_legal(self, src, dst, captured_sq, ksq, check_mask, occ) -> bool:
+        # must resolve any check, and must not open a slider line onto the king once both pawns leave
+        if not check_mask & ((1 << dst) | (1 << captured_sq)):
+            return False
+        occ_after = (occ ^ (1 << src) ^ (1 << captured_sq)) | (1 << dst)
+        them = BLACK if self.white_to_move else 0
+        bb = self.bb
+        queens = bb[them + QUEEN]
+        if rook_attacks(ksq, occ_after) & (bb[them + ROOK] | queens):
+            return False
+        return not bishop_attacks(ksq, occ_after) & (bb[them + BISHOP] | queens)
+
+    # --- draws -------------------------------------------------------------------------------
+
+    def check_insufficient_material(self):
+        bb = self.bb
+        white_pieces = [SYMBOLS[p] for p in range(6) for _ in range(bin(bb[p]).count("1"))]
+        black_pieces = [SYMBOLS[p] for p in range(6, 12) for _ in range(bin(bb[p]).count("1"))]
+        white_minors = sorted(s for s in white_pieces if s != 'K')
+        black_minors = sorted(s for s in black_pieces if s != 'k')
+
+        # Only kings
+        if not white_minors and not black_minors:
+            return True
+
+        # King and one minor piece vs. king, or king and two knights vs. king
+        for mine, theirs in ((white_minors, black_minors), (black_minors, white_minors)):
+            if theirs:
+                continue
+            if len(mine) == 1 and mine[0].upper() in ('B', 'N'):
+                return True
+            if [s.upper() for s in mine] == ['N', 'N']:
+                return True
+
+        return False
+
+    def check_fifty_move_rule(self):
+        return self.half_move_clock >= 100
+
+    def check_threefold_repetition(self) -> bool:
+        return self._pos_counts.get(self.zobrist_key, 0) >= 3
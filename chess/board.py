@@ -1,15 +1,29 @@
 
-from constants import WHITE_PIECES, BLACK_PIECES
+from chess.constants import WHITE_PIECES, BLACK_PIECES
 
-from pieces.king import King
-from pieces.queen import Queen
-from pieces.rook import Rook
-from pieces.bishop import Bishop
-from pieces.knight import Knight
-from pieces.pawn import Pawn
+from chess.pieces.king import King
+from chess.pieces.queen import Queen
+from chess.pieces.rook import Rook
+from chess.pieces.bishop import Bishop
+from chess.pieces.knight import Knight
+from chess.pieces.pawn import Pawn
 
 from collections import Counter
-from fen import fen_key
+from chess.attacks import (KNIGHT_ATTACKS, KING_ATTACKS, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS,
+                           ORTHOGONAL_RAYS, DIAGONAL_RAYS)
+from chess.bitboard import BitboardBoard
+from chess.mailbox import empty_mailbox, EMPTY, INDEX as MAILBOX_INDEX
+from chess.perft import perft as run_perft, divide as run_divide
+from chess.fen import from_fen as load_fen, to_fen
+from chess.packed import to_packed, unpack_fen, reduce_board
+from chess.pieces.base import Piece
+from chess.status import compute_status
+from chess.move import PackedMove, encode_move, TACTICAL
+from chess.movegen import legal_moves as generate_legal_moves
+from chess.zobrist import (piece_key, castling_rights, ep_file, compute_key,
+                           SIDE_KEY, CASTLE_KEYS, EP_KEYS)
+from chess import evaluation
+from chess.evaluation import MG_TABLES, EG_TABLES, PHASE, compute_scores, blend
 
 
 def alg_to_rc(alg: str) -> tuple[int, int]:
@@ -26,12 +40,32 @@ def rc_to_alg(rc: tuple[int, int]) -> str:
     return f"{file_ch}{rank_ch}"
 
 
+_PIECE_CLASSES = {'K': King, 'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight, 'P': Pawn}
+
+
+def _new_piece(board, symbol, square):
+    # piece factory for chess.fen.from_fen
+    return _PIECE_CLASSES[symbol.upper()](board, square, symbol.isupper())
+
+
 class Board:
-    def __init__(self):
-        self.white_pieces = WHITE_PIECES
-        self.black_pieces = BLACK_PIECES
+    BACKENDS = ("objects", "bitboard")
 
-        self.WIDTH = self.HEIGHT = 8
+    def __new__(cls, backend="objects"):
+        # backend="bitboard" hands back a chess.bitboard.BitboardBoard with the same surface
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Unknown board backend: {backend!r}")
+        if backend == "bitboard":
+            return BitboardBoard()
+        return super().__new__(cls)
+
+    backend = "objects"
+    # packed_legal_moves(captures=...) still runs every piece's full pseudo-legal generator, so
+    # chess.movepick generates a node's moves once and splits them
+    LAZY_CAPTURES = False
+
+    def __init__(self, backend="objects"):
+        self._init_state()
 
         self.white_king = King(self, alg_to_rc('e1'), True)
         self.white_queen = Queen(self, alg_to_rc('d1'), True)
@@ -86,7 +120,24 @@ class Board:
                       self.black_pawn1, self.black_pawn2, self.black_pawn3, self.black_pawn4,
                       self.black_pawn5, self.black_pawn6, self.black_pawn7, self.black_pawn8]
 
+        for piece in self.white_objects.union(self.black_objects):
+            self.set_piece(piece.location, piece)
+
+        self._reset_position_tracking()
+
+    def _init_state(self):
+        # everything but the pieces: an empty board, white to move, no history
+        self.white_pieces = WHITE_PIECES
+        self.black_pieces = BLACK_PIECES
+
+        self.WIDTH = self.HEIGHT = 8
+
+        self.white_king = self.black_king = None
+        self.white_objects = set()
+        self.black_objects = set()
+
         self.board = [[None] * 8 for _ in range(8)]
+        self.mailbox = empty_mailbox()  # 10x12 piece codes mirroring self.board, see chess.mailbox
 
         self.history = []  # list of Move objects
         self.positions = []  # list of FEN strings
@@ -104,17 +155,13 @@ class Board:
         self._half_move_stack = []
         self._full_move_stack = []
         self._ep_stack = []
+        self._key_stack = []  # (zobrist delta, castling rights, ep file) per move
+        self._eval_stack = []  # (mg_score, eg_score, phase) before each move
 
-        self._record_position()
-
-        self.checkmate = False
-        self.stalemate = False
+        self._status = None  # chess.status.GameStatus of this position, see status()
 
         self.white_to_move = True
 
-        for piece in self.white_objects.union(self.black_objects):
-            self.set_piece(piece.location, piece)
-
     def in_bounds(self, square: tuple[int, int]) -> bool:
         row, col = square
         return 0 <= row < self.HEIGHT and 0 <= col < self.WIDTH
@@ -128,11 +175,18 @@ class Board:
         self.board[row][col] = piece
         if piece:
             piece.location = square
+            self.mailbox[MAILBOX_INDEX[row][col]] = ord(piece.symbol)
+        else:
+            self.mailbox[MAILBOX_INDEX[row][col]] = EMPTY
 
     def is_empty(self, square: tuple[int, int]) -> bool:
         return self.get_piece(square) is None
 
     def make_move(self, move):
+        if type(move) is int:  # packed move, see chess.move.encode_move
+            move = PackedMove(move)
+        self._status = None
+
         # save state for unmaking move
         self._half_move_stack.append(self.half_move_clock)
         self._full_move_stack.append(self.full_move_number)
@@ -149,30 +203,48 @@ class Board:
             raise ValueError(f"No piece at {source}")
 
         target_piece = self.get_piece(destination)
+        captured_square = destination
 
         if move.en_passant:
-            target_piece = self.get_piece(move.captured_en_passant_square)
-            self.set_piece(move.captured_en_passant_square, None)
+            captured_square = move.captured_en_passant_square
+            target_piece = self.get_piece(captured_square)
+            self.set_piece(captured_square, None)
 
         if target_piece and target_piece.white == moving_piece.white:
             raise ValueError(f"Cannot move onto friendly piece at {destination}")
 
+        # zobrist delta for this move, undone by XOR in unmake_move
+        delta = SIDE_KEY ^ piece_key(moving_piece.symbol, source)
+
+        # incremental evaluation (see chess.evaluation), restored from _eval_stack in unmake_move
+        self._eval_stack.append((self.mg_score, self.eg_score, self.phase))
+        sq = source[0] * 8 + source[1]
+        mg = self.mg_score - MG_TABLES[moving_piece.symbol][sq]
+        eg = self.eg_score - EG_TABLES[moving_piece.symbol][sq]
+        phase = self.phase
+
         if target_piece:
             (self.white_objects if target_piece.white else self.black_objects).discard(target_piece)
             target_piece.location = None
+            delta ^= piece_key(target_piece.symbol, captured_square)
+            sq = captured_square[0] * 8 + captured_square[1]
+            mg -= MG_TABLES[target_piece.symbol][sq]
+            eg -= EG_TABLES[target_piece.symbol][sq]
+            phase -= PHASE[target_piece.symbol]
 
         self.set_piece(source, None)
         self.set_piece(destination, moving_piece)
 
         if move.promotion:
             promoted_pawn = moving_piece
-            if move.promotion == 'Q':
+            promotion = move.promotion.upper()  # black pawns generate lowercase promotions
+            if promotion == 'Q':
                 promoted_piece = Queen(self, destination, moving_piece.white)
-            elif move.promotion == 'R':
+            elif promotion == 'R':
                 promoted_piece = Rook(self, destination, moving_piece.white)
-            elif move.promotion == 'B':
+            elif promotion == 'B':
                 promoted_piece = Bishop(self, destination, moving_piece.white)
-            elif move.promotion == 'N':
+            elif promotion == 'N':
                 promoted_piece = Knight(self, destination, moving_piece.white)
 
             (self.white_objects if moving_piece.white else self.black_objects).discard(moving_piece)
@@ -182,6 +254,15 @@ class Board:
 
             moving_piece.location = None
             self.promoted_pawns.append(promoted_pawn)
+            delta ^= piece_key(promoted_piece.symbol, destination)
+            placed = promoted_piece.symbol
+            phase += PHASE[placed]
+        else:
+            delta ^= piece_key(moving_piece.symbol, destination)
+            placed = moving_piece.symbol
+        sq = destination[0] * 8 + destination[1]
+        mg += MG_TABLES[placed][sq]
+        eg += EG_TABLES[placed][sq]
 
         if move.castle_ks:
             if moving_piece.white:
@@ -195,6 +276,11 @@ class Board:
             self.set_piece(rook_destination, rook)
             if hasattr(rook, "times_moved"):
                 rook.times_moved += 1
+            delta ^= piece_key(rook.symbol, rook_source) ^ piece_key(rook.symbol, rook_destination)
+            mg += (MG_TABLES[rook.symbol][rook_destination[0] * 8 + rook_destination[1]]
+                   - MG_TABLES[rook.symbol][rook_source[0] * 8 + rook_source[1]])
+            eg += (EG_TABLES[rook.symbol][rook_destination[0] * 8 + rook_destination[1]]
+                   - EG_TABLES[rook.symbol][rook_source[0] * 8 + rook_source[1]])
 
         if move.castle_qs:
             if moving_piece.white:
@@ -208,10 +294,17 @@ class Board:
             self.set_piece(rook_destination, rook)
             if hasattr(rook, "times_moved"):
                 rook.times_moved += 1
+            delta ^= piece_key(rook.symbol, rook_source) ^ piece_key(rook.symbol, rook_destination)
+            mg += (MG_TABLES[rook.symbol][rook_destination[0] * 8 + rook_destination[1]]
+                   - MG_TABLES[rook.symbol][rook_source[0] * 8 + rook_source[1]])
+            eg += (EG_TABLES[rook.symbol][rook_destination[0] * 8 + rook_destination[1]]
+                   - EG_TABLES[rook.symbol][rook_source[0] * 8 + rook_source[1]])
 
         if hasattr(moving_piece, "times_moved"):
             moving_piece.times_moved += 1
 
+        self.mg_score, self.eg_score, self.phase = mg, eg, phase
+
         self.history.append(move)
         self.captured_pieces.append(target_piece)
 
@@ -236,6 +329,22 @@ class Board:
         if self.white_to_move:
             self.full_move_number += 1
 
+        # castling rights can only ever be lost, so skip the rescan once they are gone
+        old_castling = self._castling_rights
+        if old_castling:
+            self._castling_rights = castling_rights(self)
+            delta ^= CASTLE_KEYS[old_castling] ^ CASTLE_KEYS[self._castling_rights]
+
+        old_ep_file = self._ep_file
+        self._ep_file = ep_file(self) if self.ep_square is not None else None
+        if old_ep_file is not None:
+            delta ^= EP_KEYS[old_ep_file]
+        if self._ep_file is not None:
+            delta ^= EP_KEYS[self._ep_file]
+
+        self._key_stack.append((delta, old_castling, old_ep_file))
+        self.zobrist_key ^= delta
+
         # Record position for threefold
         self._record_position()
 
@@ -244,6 +353,7 @@ class Board:
     def unmake_move(self):
         if len(self.history) == 0:
             return
+        self._status = None
 
         if self._pos_history:
             last = self._pos_history.pop()
@@ -323,28 +433,163 @@ class Board:
         self.full_move_number = self._full_move_stack.pop()
         self.ep_square = self._ep_stack.pop()
 
-    def legal_moves(self):
-        check_white_king = self.white_to_move  # on white's turn, we need to check if the white king is in check
-        in_check_before_moving = self.check(check_white_king)
-
+        delta, self._castling_rights, self._ep_file = self._key_stack.pop()
+        self.zobrist_key ^= delta
+        self.mg_score, self.eg_score, self.phase = self._eval_stack.pop()
+
+    def evaluate(self) -> int:
+        # tapered material + piece-square score for the side to move, from the incremental scores
+        if evaluation.DEBUG:
+            evaluation.verify_scores(self)
+        score = blend(self.mg_score, self.eg_score, self.phase)
+        return score if self.white_to_move else -score
+
+    def legal_moves(self, reference=False):
+        """Return the legal moves for the side to move.
+
+        With reference=True every pseudo-legal move is made, tested for check and unmade. That
+        path is slow but simple, and kept so the direct generator can be cross-checked against it.
+        """
+        if reference:
+            # on white's turn, we need to check if the white king is in check
+            return self._legal_moves_by_make_unmake(self.white_to_move)
+        return generate_legal_moves(self)
+
+    def status(self):
+        """The chess.status.GameStatus of this position: legal moves, check, result.
+
+        Computed on first use and kept until the next make_move or unmake_move.
+        """
+        if self._status is None:
+            self._status = compute_status(self)
+        return self._status
+
+    @property
+    def castling_mask(self) -> int:
+        # KQkq castling rights as chess.zobrist CASTLE_* bits, like BitboardBoard.castling_mask
+        return self._castling_rights
+
+    @property
+    def checkmate(self) -> bool:
+        return self.status().checkmate
+
+    @property
+    def stalemate(self) -> bool:
+        return self.status().stalemate
+
+    def packed_legal_moves(self, reference=False, captures=None):
+        # legal moves as packed ints (see chess.move), accepted directly by make_move;
+        # captures=True/False keeps only captures and promotions / only the other moves
+        if not reference:
+            return [encode_move(move) for move in generate_legal_moves(self, captures)]
+        moves = [encode_move(move) for move in self.legal_moves(reference)]
+        if captures is not None:
+            moves = [move for move in moves if bool(move & TACTICAL) == captures]
+        return moves
+
+    def perft(self, depth):
+        # leaf node count of the legal move tree, see chess.perft
+        return run_perft(self, depth)
+
+    def divide(self, depth):
+        # perft split by root move, {uci move: nodes}
+        return run_divide(self, depth)
+
+    def probe_tablebase(self, tablebase):
+        # win/draw/loss and distance to mate from a chess.tablebase.Tablebase, None if not covered
+        return tablebase.probe(self)
+
+    def to_packed(self) -> bytes:
+        # fixed-size 36-byte encoding of the position, see chess.packed
+        return to_packed(self)
+
+    @classmethod
+    def from_packed(cls, data, backend="objects"):
+        # a new board of the given backend set up from a to_packed record
+        return cls.from_fen(unpack_fen(data), backend)
+
+    @classmethod
+    def from_fen(cls, fen, backend="objects"):
+        """A new board of the given backend set up from fen.
+
+        Unlike Board() followed by chess.fen.from_fen, the start position is never built.
+        """
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Unknown board backend: {backend!r}")
+        if backend == "bitboard":
+            return BitboardBoard.from_fen(fen)
+        board = super().__new__(cls)
+        board._init_state()
+        load_fen(board, fen, _new_piece)
+        return board
+
+    def copy(self):
+        """An independent board in the same state, history included.
+
+        Pieces are copied one level deep and pointed at the new board; moves, which never change,
+        are shared.
+        """
+        board = super().__new__(type(self))
+        twins = {}
+
+        def twin(piece):
+            if piece is None:
+                return None
+            new = twins.get(id(piece))
+            if new is None:
+                new = twins[id(piece)] = object.__new__(piece.__class__)
+                new.__dict__.update(piece.__dict__)
+                new.board = board
+            return new
+
+        state = {name: twin(value) if isinstance(value, Piece) else value
+                 for name, value in self.__dict__.items()}
+        state.update(
+            board=[[twin(piece) for piece in row] for row in self.board],
+            mailbox=bytearray(self.mailbox),
+            white_objects={twin(piece) for piece in self.white_objects},
+            black_objects={twin(piece) for piece in self.black_objects},
+            captured_pieces=[twin(piece) for piece in self.captured_pieces],
+            promoted_pawns=[twin(piece) for piece in self.promoted_pawns],
+            history=list(self.history),
+            positions=list(self.positions),
+            _pos_counts=Counter(self._pos_counts),
+            _pos_history=list(self._pos_history),
+            _half_move_stack=list(self._half_move_stack),
+            _full_move_stack=list(self._full_move_stack),
+            _ep_stack=list(self._ep_stack),
+            _key_stack=list(self._key_stack),
+            _eval_stack=list(self._eval_stack),
+        )
+        if "pawns" in state:
+            state["pawns"] = [twin(piece) for piece in self.pawns]
+        board.__dict__.update(state)
+        return board
+
+    def __reduce__(self):
+        # pickle as the FEN before the first move plus the packed moves since, so unmake_move and
+        # repetition counts still work on the other side
+        return reduce_board(self)
+
+    @classmethod
+    def _from_history(cls, fen, moves):
+        board = cls.from_fen(fen)
+        for move in moves:
+            board.make_move(move)
+        return board
+
+    def _legal_moves_by_make_unmake(self, check_white_king):
         legal_moves = []
         pieces = self.white_objects if check_white_king else self.black_objects
-        for piece in pieces:
+        for piece in list(pieces):  # make_move swaps pieces in and out on promotion
             moves = piece.pseudo_legal_moves()
             if moves:
                 for move in moves:
                     self.make_move(move)
                     if not self.check(check_white_king):
-                        if not (in_check_before_moving and (move.castle_ks or move.castle_qs)):
-                            legal_moves.append(move)
+                        legal_moves.append(move)
                     self.unmake_move()
 
-        if len(legal_moves) == 0:
-            if in_check_before_moving:
-                self.checkmate = True
-            else:
-                self.stalemate = True
-
         return legal_moves
 
     def get_enemy_pieces(self, white):
@@ -359,38 +604,70 @@ class Board:
         else:
             return self.black_king.location
 
-    def check(self, check_white_king):
-        enemy_pieces = self.get_enemy_pieces(check_white_king)
-        check = False
+    def is_square_attacked(self, square, by_white) -> bool:
+        # Look outward from `square` for a piece of the attacking colour that could capture on it
+        board = self.board
+        row, col = square
+        if by_white:
+            knight, bishop, rook, queen, king, pawn = 'N', 'B', 'R', 'Q', 'K', 'P'
+            pawn_sources = BLACK_PAWN_ATTACKS  # white pawns attacking (r, c) stand on (r + 1, c +- 1)
+        else:
+            knight, bishop, rook, queen, king, pawn = 'n', 'b', 'r', 'q', 'k', 'p'
+            pawn_sources = WHITE_PAWN_ATTACKS
+
+        for r, c in KNIGHT_ATTACKS[row][col]:
+            piece = board[r][c]
+            if piece is not None and piece.symbol == knight:
+                return True
+
+        for r, c in pawn_sources[row][col]:
+            piece = board[r][c]
+            if piece is not None and piece.symbol == pawn:
+                return True
+
+        for r, c in KING_ATTACKS[row][col]:
+            piece = board[r][c]
+            if piece is not None and piece.symbol == king:
+                return True
+
+        for ray in ORTHOGONAL_RAYS[row][col]:
+            for r, c in ray:
+                piece = board[r][c]
+                if piece is not None:
+                    if piece.symbol == rook or piece.symbol == queen:
+                        return True
+                    break
+
+        for ray in DIAGONAL_RAYS[row][col]:
+            for r, c in ray:
+                piece = board[r][c]
+                if piece is not None:
+                    if piece.symbol == bishop or piece.symbol == queen:
+                        return True
+                    break
 
-        for piece in enemy_pieces:
-            moves = piece.pseudo_legal_moves()
-            if moves:
-                for move in moves:
-                    if move.destination == self.get_king(check_white_king):
-                        check = True
+        return False
 
-        return check
+    def check(self, check_white_king):
+        return self.is_square_attacked(self.get_king(check_white_king), not check_white_king)
 
     def check_insufficient_material(self):
-        # Count remaining pieces
-        white_pieces = [piece.symbol for piece in self.white_objects]
-        black_pieces = [piece.symbol for piece in self.black_objects]
+        # Remaining pieces other than the kings, by kind (the piece sets are unordered)
+        white_minors = sorted(piece.symbol for piece in self.white_objects if piece.symbol != 'K')
+        black_minors = sorted(piece.symbol.upper() for piece in self.black_objects if piece.symbol != 'k')
 
         # Only kings
-        if len(white_pieces) == 1 and len(black_pieces) == 1:
+        if not white_minors and not black_minors:
             return True
 
-        # King and one minor piece vs. king
-        minor_pieces = {'B', 'N'}
-        if (len(white_pieces) == 2 and white_pieces[1] in minor_pieces and len(black_pieces) == 1) or \
-                (len(black_pieces) == 2 and black_pieces[1] in minor_pieces and len(white_pieces) == 1):
-            return True
-
-        # King and two knights vs. king (for both sides)
-        if (len(white_pieces) == 3 and sorted(white_pieces[1:]) == ['N', 'N'] and len(black_pieces) == 1) or \
-                (len(black_pieces) == 3 and sorted(black_pieces[1:]) == ['n', 'n'] and len(white_pieces) == 1):
-            return True
+        # King and one minor piece vs. king, or king and two knights vs. king
+        for mine, theirs in ((white_minors, black_minors), (black_minors, white_minors)):
+            if theirs:
+                continue
+            if len(mine) == 1 and mine[0] in ('B', 'N'):
+                return True
+            if mine == ['N', 'N']:
+                return True
 
         return False
 
@@ -398,9 +675,31 @@ class Board:
         return self.half_move_clock >= 100
 
     def _record_position(self):
-        key = fen_key(self)
+        key = self.zobrist_key
         self._pos_history.append(key)
         self._pos_counts[key] += 1
 
+    def _reset_position_tracking(self):
+        # Recompute the zobrist key from scratch and restart the game at this position: repetition
+        # tracking, the move history and every undo stack (as BitboardBoard.set_fen does)
+        self.history = []
+        self.positions = []
+        self.captured_pieces = []
+        self.promoted_pawns = []
+        self._half_move_stack = []
+        self._full_move_stack = []
+        self._ep_stack = []
+        self._castling_rights = castling_rights(self)
+        self._ep_file = ep_file(self)
+        self.zobrist_key = compute_key(self)
+        self._key_stack = []
+        self.mg_score, self.eg_score, self.phase = compute_scores(self)
+        self._eval_stack = []
+        self._pos_counts = Counter()
+        self._pos_history = []
+        self._record_position()
+        self._status = None
+
     def check_threefold_repetition(self) -> bool:
-        return self._pos_counts.get(fen_key(self), 0) >= 3
+        return self._pos_counts.get(self.zobrist_key, 0) >= 3
+
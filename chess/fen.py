@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import Callable, Optional, Any
 
+from chess.mailbox import empty_mailbox, to_placement as mailbox_to_placement
+
 Square = tuple[int, int]
 FILES = "abcdefgh"
 
@@ -42,6 +44,12 @@ def _castling_rights_string(board) -> str:
     # Derive 'KQkq' (castling legality) from kings/rooks on start squares and their times_moved flags
     rights: list[str] = []
 
+    # both board backends keep a KQkq bitmask (castling_mask); other boards are read off the pieces
+    mask = getattr(board, "castling_mask", None)
+    if mask is not None:
+        rights = [ch for bit, ch in ((1, 'K'), (2, 'Q'), (4, 'k'), (8, 'q')) if mask & bit]
+        return "".join(rights) if rights else "-"
+
     wk = getattr(board, "white_king", None)
     bk = getattr(board, "black_king", None)
 
@@ -66,9 +74,8 @@ def _castling_rights_string(board) -> str:
     return "".join(rights) if rights else "-"
 
 
-def to_fen(board, *, normalize_ep: bool = False) -> str:
-    """Return a full FEN. If normalize_ep=True, EP is '-' unless an EP capture is currently legal."""
-    # piece placement (ranks 8→1 are rows 0→7)
+def _placement_from_squares(board) -> str:
+    # piece placement read square by square through board.get_piece
     ranks: list[str] = []
     for r in range(8):
         empties = 0
@@ -85,7 +92,17 @@ def to_fen(board, *, normalize_ep: bool = False) -> str:
         if empties:
             out.append(str(empties))
         ranks.append("".join(out))
-    placement = "/".join(ranks)
+    return "/".join(ranks)
+
+
+def to_fen(board, *, normalize_ep: bool = False) -> str:
+    """Return a full FEN. If normalize_ep=True, EP is '-' unless an EP capture is currently legal."""
+    # piece placement (ranks 8→1 are rows 0→7)
+    mailbox = getattr(board, "mailbox", None)
+    if mailbox is not None:
+        placement = mailbox_to_placement(mailbox)
+    else:
+        placement = _placement_from_squares(board)
 
     # active color
     active = "w" if getattr(board, "white_to_move", True) else "b"
@@ -107,6 +124,30 @@ def to_fen(board, *, normalize_ep: bool = False) -> str:
     return f"{placement} {active} {castling} {ep} {half} {full}"
 
 
+def parse_placement(placement: str) -> list[tuple[Square, str]]:
+    # FEN piece-placement field -> [((row, col), symbol), ...], ranks 8→1 as rows 0→7
+    rows = placement.split("/")
+    if len(rows) != 8:
+        raise ValueError("FEN piece placement must have 8 ranks")
+
+    pieces: list[tuple[Square, str]] = []
+    for r, rank in enumerate(rows):
+        c = 0
+        for ch in rank:
+            if ch.isdigit():
+                c += int(ch)
+            else:
+                if c >= 8:
+                    raise ValueError("Too many files in rank")
+                if ch not in "PNBRQKpnbrqk":
+                    raise ValueError(f"Unknown FEN symbol: {ch}")
+                pieces.append(((r, c), ch))
+                c += 1
+        if c != 8:
+            raise ValueError("Not enough files in rank")
+    return pieces
+
+
 def from_fen(
         board,
         fen: str,
@@ -120,8 +161,15 @@ def from_fen(
 
     placement, active, castling, ep, half, full = fields
 
+    # backends with their own representation load themselves (see chess.bitboard)
+    set_fen = getattr(board, "set_fen", None)
+    if set_fen is not None:
+        set_fen(fen)
+        return
+
     # clear board + sets
     board.board = [[None for _ in range(8)] for _ in range(8)]
+    board.mailbox = empty_mailbox()
     board.white_objects.clear()
     board.black_objects.clear()
 
@@ -131,53 +179,38 @@ def from_fen(
             white = sym.isupper()
             s = sym.upper()
             if s == "P":
-                from pieces.pawn import Pawn
+                from chess.pieces.pawn import Pawn
                 return Pawn(b, sq, white)
             elif s == "N":
-                from pieces.knight import Knight
+                from chess.pieces.knight import Knight
                 return Knight(b, sq, white)
             elif s == "B":
-                from pieces.bishop import Bishop
+                from chess.pieces.bishop import Bishop
                 return Bishop(b, sq, white)
             elif s == "R":
-                from pieces.rook import Rook
+                from chess.pieces.rook import Rook
                 return Rook(b, sq, white)
             elif s == "Q":
-                from pieces.queen import Queen
+                from chess.pieces.queen import Queen
                 return Queen(b, sq, white)
             elif s == "K":
-                from pieces.king import King
+                from chess.pieces.king import King
                 return King(b, sq, white)
             else:
                 raise ValueError(f"Unknown FEN symbol: {sym}")
 
     # placement
-    rows = placement.split("/")
-    if len(rows) != 8:
-        raise ValueError("FEN piece placement must have 8 ranks")
-
-    for r, rank in enumerate(rows):
-        c = 0
-        for ch in rank:
-            if ch.isdigit():
-                c += int(ch)
-            else:
-                if c >= 8:
-                    raise ValueError("Too many files in rank")
-                sq = (r, c)
-                piece = piece_factory(board, ch, sq)
-                board.set_piece(sq, piece)
-                (board.white_objects if piece.white else board.black_objects).add(piece)
-                if ch == "K":
-                    board.white_king = piece
-                if ch == "k":
-                    board.black_king = piece
-                # default times_moved = 0 for all pieces; adjust kings/rooks below
-                if hasattr(piece, "times_moved"):
-                    piece.times_moved = 0
-                c += 1
-        if c != 8:
-            raise ValueError("Not enough files in rank")
+    for sq, ch in parse_placement(placement):
+        piece = piece_factory(board, ch, sq)
+        board.set_piece(sq, piece)
+        (board.white_objects if piece.white else board.black_objects).add(piece)
+        if ch == "K":
+            board.white_king = piece
+        if ch == "k":
+            board.black_king = piece
+        # default times_moved = 0 for all pieces; adjust kings/rooks below
+        if hasattr(piece, "times_moved"):
+            piece.times_moved = 0
 
     # active color
     board.white_to_move = (active == "w")
@@ -234,6 +267,11 @@ def from_fen(
     board.half_move_clock = int(fields[4])
     board.full_move_number = int(fields[5])
 
+    # position key and repetition tracking restart from the loaded position
+    reset = getattr(board, "_reset_position_tracking", None)
+    if reset is not None:
+        reset()
+
 
 def fen_key(board) -> str:
     # 4-field, normalized FEN key for threefold repetition:
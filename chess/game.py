@@ -2,9 +2,17 @@ from __future__ import annotations
 
 from chess.board import Board
 from chess.san import parse_san_to_move
+from chess.status import CHECKMATE, STALEMATE, INSUFFICIENT_MATERIAL, FIFTY_MOVES, THREEFOLD_REPETITION
 
 FILES = "abcdefgh"
 
+GAME_OVER = {
+    STALEMATE: "Stalemate.",
+    INSUFFICIENT_MATERIAL: "Insufficient Material.",
+    FIFTY_MOVES: "Fifty-move rule draw.",
+    THREEFOLD_REPETITION: "Threefold repetition draw.",
+}
+
 
 def print_board(board: Board) -> None:
     # row 0 is rank 8; row 7 is rank 1
@@ -27,26 +35,18 @@ def main() -> None:
     print_board(board)
 
     while True:
-        # game end checks
-        if board.checkmate:
+        # game end checks; the status is computed once per position, and resolving the SAN keeps it
+        status = board.status()
+        if status.reason == CHECKMATE:
             print(f"Checkmate! {'Black' if board.white_to_move else 'White'} wins.")
             break
-        if board.stalemate:
-            print("Stalemate.")
-            break
-        if board.check_insufficient_material():
-            print("Insufficient Material.")
-            break
-        if board.check_fifty_move_rule():
-            print("Fifty-move rule draw.")
-            break
-        if board.check_threefold_repetition():
-            print("Threefold repetition draw.")
+        if status.is_over:
+            print(GAME_OVER[status.reason])
             break
 
         # print status
         turn = side_str(board)
-        in_check = board.check(board.white_to_move)
+        in_check = status.in_check
         print(
             f"{turn} to move{' (check)' if in_check else ''}. Enter SAN (e.g., e4, Nf3, O-O), "
             f"or 'undo', 'print', 'quit'.")
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import pstats
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import wraps
+
+# Opt-in counters and timers for the rules engine's hot paths: python -m chess.instrument
+#
+#   with instrument.profile() as prof:
+#       searcher.search(depth=5)
+#   print(prof.report())            # calls, total and own time per function
+#   prof.dump_stats("search.prof")  # cProfile-compatible, for pstats or any profile viewer
+#
+# The first enable() swaps timing wrappers in for the functions in HOOKS, and the disable() that
+# matches the last outstanding enable() puts the originals back. While disabled nothing is
+# wrapped, so the engine runs exactly the code it runs without this module. chess.fen.to_fen and
+# fen_key are also replaced in every chess module that imported them by name.
+#
+# Times are inclusive ("seconds") and exclusive of other instrumented callees ("own_seconds").
+# Every thread keeps its own counters: snapshot() adds them all up, and a profile() block sees only
+# the calls made on the thread that entered it, so requests served on different threads are
+# measured apart. Work a request hands to other threads or processes is not in its profile.
+# pseudo_legal_moves is counted per piece class on the objects backend; the bitboard backend
+# generates every piece type in one pass, which shows up as packed_legal_moves.
+
+# (module, class or None for module functions, function names)
+HOOKS = (
+    ("chess.board", "Board", ("make_move", "unmake_move", "legal_moves", "check")),
+    ("chess.bitboard", "BitboardBoard", ("make_move", "unmake_move", "legal_moves", "packed_legal_moves",
+                                         "check")),
+    ("chess.pieces.pawn", "Pawn", ("pseudo_legal_moves",)),
+    ("chess.pieces.knight", "Knight", ("pseudo_legal_moves",)),
+    ("chess.pieces.bishop", "Bishop", ("pseudo_legal_moves",)),
+    ("chess.pieces.rook", "Rook", ("pseudo_legal_moves",)),
+    ("chess.pieces.queen", "Queen", ("pseudo_legal_moves",)),
+    ("chess.pieces.king", "King", ("pseudo_legal_moves",)),
+    ("chess.fen", None, ("to_fen", "fen_key")),
+)
+
+REPORT_ROWS = 20
+
+
+class _Counter:
+    __slots__ = ("key", "calls", "total_ns", "own_ns", "callers")
+
+    def __init__(self, key):
+        self.key = key  # (file, line, label), the function key pstats uses
+        self.calls = self.total_ns = self.own_ns = 0
+        self.callers = {}  # caller label -> [calls, total_ns, own_ns]
+
+
+@dataclass(frozen=True)
+class FunctionStats:
+    calls: int
+    seconds: float  # inclusive
+    own_seconds: float  # less the time spent in other instrumented functions it called
+    callers: dict[str, tuple[int, float, float]] = field(default_factory=dict)  # label -> (calls, s, own s)
+    key: tuple = ("~", 0, "")  # pstats (file, line, function)
+
+    @property
+    def per_call_us(self) -> float:
+        return self.seconds * 1e6 / self.calls if self.calls else 0.0
+
+
+class _ThreadState:
+    __slots__ = ("stack", "counters")
+
+    def __init__(self):
+        self.stack = []  # [ns in instrumented callees, label] per instrumented call in progress
+        self.counters = {}  # label -> _Counter
+
+
+_installed = []  # (owner, name, original, wrapper, owned) for everything enable() replaced
+_enable_count = 0
+_states = []  # every thread's _ThreadState, for snapshot() and reset()
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def _thread_state() -> _ThreadState:
+    try:
+        return _local.state
+    except AttributeError:
+        state = _local.state = _ThreadState()
+        with _lock:
+            _states.append(state)
+        return state
+
+
+def _wrap(label, func):
+    code = func.__code__
+    key = (code.co_filename, code.co_firstlineno, label)
+    clock = time.perf_counter_ns
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            state = _local.state
+        except AttributeError:
+            state = _thread_state()
+        counter = state.counters.get(label)
+        if counter is None:
+            counter = state.counters[label] = _Counter(key)
+        stack = state.stack
+        frame = [0, label]  # ns spent in instrumented callees, and who they were called from
+        stack.append(frame)
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            stack.pop()
+            own = elapsed - frame[0]
+            counter.calls += 1
+            counter.total_ns += elapsed
+            counter.own_ns += own
+            if stack:
+                parent = stack[-1]
+                parent[0] += elapsed
+                edge = counter.callers.get(parent[1])
+                if edge is None:
+                    edge = counter.callers[parent[1]] = [0, 0, 0]
+                edge[0] += 1
+                edge[1] += elapsed
+                edge[2] += own
+
+    wrapper.__instrumented__ = func
+    return wrapper
+
+
+def _targets():
+    # (owner, name, label) for every function to wrap
+    for module_name, class_name, names in HOOKS:
+        module = importlib.import_module(module_name)
+        owner = getattr(module, class_name) if class_name else module
+        prefix = class_name or module_name.rsplit(".", 1)[1]
+        for name in names:
+            yield owner, name, f"{prefix}.{name}"
+
+
+def enabled() -> bool:
+    return bool(_installed)
+
+
+def enable():
+    """Start counting, or keep counting; every enable() needs its own disable().
+
+    Counters carry on from where they were; see reset().
+    """
+    global _enable_count
+    with _lock:
+        _enable_count += 1
+        if _installed:
+            return
+        for owner, name, label in _targets():
+            original = getattr(owner, name)
+            wrapper = _wrap(label, original)
+            # a class that inherits the method gets its own attribute, removed again on disable()
+            owned = not isinstance(owner, type) or name in owner.__dict__
+            setattr(owner, name, wrapper)
+            _installed.append((owner, name, original, wrapper, owned))
+            if not isinstance(owner, type):
+                for module in _chess_modules():
+                    if module is not owner and module.__dict__.get(name) is original:
+                        setattr(module, name, wrapper)
+                        _installed.append((module, name, original, wrapper, True))
+
+
+def disable():
+    # the last outstanding disable() uninstalls the wrappers
+    global _enable_count
+    with _lock:
+        if _enable_count == 0:
+            return
+        _enable_count -= 1
+        if _enable_count:
+            return
+        while _installed:
+            owner, name, original, wrapper, owned = _installed.pop()
+            if owned:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+
+
+def _chess_modules():
+    return [module for name, module in list(sys.modules.items())
+            if module is not None and (name == "chess" or name.startswith("chess."))]
+
+
+def reset():
+    with _lock:
+        for state in _states:
+            state.counters.clear()
+
+
+def snapshot(current_thread: bool = False) -> dict[str, FunctionStats]:
+    """Counters so far, by label ("Board.make_move", "Queen.pseudo_legal_moves", "fen.to_fen").
+
+    Summed over all threads, or only this thread's with current_thread=True.
+    """
+    if current_thread:
+        states = [_thread_state()]
+    else:
+        with _lock:
+            states = list(_states)
+    totals = {}  # label -> [key, calls, total_ns, own_ns, {caller: [calls, total_ns, own_ns]}]
+    for state in states:
+        for label, c in list(state.counters.items()):
+            entry = totals.setdefault(label, [c.key, 0, 0, 0, {}])
+            entry[1] += c.calls
+            entry[2] += c.total_ns
+            entry[3] += c.own_ns
+            for caller, edge in list(c.callers.items()):
+                summed = entry[4].setdefault(caller, [0, 0, 0])
+                for i in range(3):
+                    summed[i] += edge[i]
+    return {label: FunctionStats(calls, total / 1e9, own / 1e9,
+                                 {caller: (n, t / 1e9, o / 1e9) for caller, (n, t, o) in callers.items()},
+                                 key)
+            for label, (key, calls, total, own, callers) in totals.items() if calls}
+
+
+def diff(after: dict[str, FunctionStats], before: dict[str, FunctionStats]) -> dict[str, FunctionStats]:
+    # what happened between two snapshots
+    stats = {}
+    for label, now in after.items():
+        then = before.get(label)
+        if then is None:
+            stats[label] = now
+            continue
+        if now.calls == then.calls:
+            continue
+        callers = {}
+        for caller, (n, total, own) in now.callers.items():
+            n0, total0, own0 = then.callers.get(caller, (0, 0.0, 0.0))
+            if n != n0:
+                callers[caller] = (n - n0, total - total0, own - own0)
+        stats[label] = FunctionStats(now.calls - then.calls, now.seconds - then.seconds,
+                                     now.own_seconds - then.own_seconds, callers, now.key)
+    return stats
+
+
+def format_report(stats: dict[str, FunctionStats], rows: int = REPORT_ROWS) -> str:
+    lines = [f"{'function':<34} {'calls':>10} {'total s':>9} {'own s':>9} {'us/call':>9}"]
+    for label, s in sorted(stats.items(), key=lambda item: -item[1].own_seconds)[:rows]:
+        lines.append(f"{label:<34} {s.calls:>10} {s.seconds:>9.3f} {s.own_seconds:>9.3f} {s.per_call_us:>9.2f}")
+    return "\n".join(lines)
+
+
+class _StatsSource:
+    # what pstats.Stats loads from: an object with create_stats() and a cProfile-style stats dict
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def to_pstats(stats: dict[str, FunctionStats]) -> pstats.Stats:
+    """A pstats.Stats over the instrumented functions (own time as tottime, inclusive as cumtime)."""
+    raw = {}
+    for s in stats.values():
+        callers = {stats[caller].key: (n, n, own, total) for caller, (n, total, own) in s.callers.items()
+                   if caller in stats}
+        raw[s.key] = (s.calls, s.calls, s.own_seconds, s.seconds, callers)
+    return pstats.Stats(_StatsSource(raw))
+
+
+class profile:
+    """Instrument a block: enables counting if it is off, and keeps what happened inside it.
+
+    report, if given, is a text stream that gets format_report() on exit; stats_path a file that
+    gets the pstats dump. Only calls made on the entering thread count, so blocks nested on one
+    thread see their own interval and blocks on other threads do not see each other's work.
+    """
+
+    def __init__(self, report=None, stats_path: str | None = None):
+        self.report_to = report
+        self.stats_path = stats_path
+        self.stats: dict[str, FunctionStats] = {}
+        self._before = None
+
+    def __enter__(self):
+        enable()
+        self._before = snapshot(current_thread=True)
+        return self
+
+    def __exit__(self, *exc):
+        self.stats = diff(snapshot(current_thread=True), self._before)
+        disable()
+        if self.report_to is not None:
+            self.report_to.write(self.report() + "\n")
+        if self.stats_path:
+            self.dump_stats(self.stats_path)
+
+    def report(self, rows: int = REPORT_ROWS) -> str:
+        return format_report(self.stats, rows)
+
+    def pstats(self) -> pstats.Stats:
+        return to_pstats(self.stats)
+
+    def dump_stats(self, path: str):
+        self.pstats().dump_stats(path)
+
+
+def main(argv=None) -> int:
+    from chess.board import Board
+    from chess.search import Searcher
+
+    parser = argparse.ArgumentParser(description="Time the rules engine's hot paths under perft or a search.")
+    parser.add_argument("--fen", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+    parser.add_argument("--backend", default="bitboard", choices=Board.BACKENDS)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--search", action="store_true", help="run a search to --depth instead of perft")
+    parser.add_argument("--pstats", dest="stats_path", default=None, help="write cProfile-compatible stats here")
+    args = parser.parse_args(argv)
+
+    board = Board.from_fen(args.fen, args.backend)
+    start = time.perf_counter()
+    with profile(stats_path=args.stats_path) as prof:
+        if args.search:
+            Searcher(board).search(depth=args.depth)
+        else:
+            board.perft(args.depth)
+    print(f"{'search' if args.search else 'perft'} depth {args.depth} ({args.backend}): "
+          f"{time.perf_counter() - start:.2f}s instrumented")
+    print(prof.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import re
+
+# 10x12 mailbox: a flat bytearray of 120 piece codes where the 8x8 board sits inside a border of
+# OFFBOARD sentinels (two rows above and below, one column either side). A ray walk or a knight
+# jump is then plain index arithmetic that stops on the sentinel, with no bounds tuples.
+#
+# Codes are FEN bytes: ord(symbol) for a piece, EMPTY ('.') for an empty square and OFFBOARD (' ')
+# outside the board, so code > EMPTY means "a piece" and code < LOWERCASE means "a white piece".
+
+Square = tuple[int, int]  # (row, col)
+
+EMPTY = ord('.')
+OFFBOARD = ord(' ')
+LOWERCASE = ord('a')
+
+# (row, col) -> mailbox index, row 0 = rank 8 as in Board.board
+INDEX = [[21 + r * 10 + c for c in range(8)] for r in range(8)]
+
+# mailbox index -> (row, col), None on the border
+SQUARE: list[Square | None] = [None] * 120
+for _r in range(8):
+    for _c in range(8):
+        SQUARE[INDEX[_r][_c]] = (_r, _c)
+
+
+def step(direction: tuple[int, int]) -> int:
+    # (d_row, d_col) -> index offset
+    dr, dc = direction
+    return dr * 10 + dc
+
+
+def empty_mailbox() -> bytearray:
+    mailbox = bytearray([OFFBOARD]) * 120
+    for r in range(8):
+        mailbox[INDEX[r][0]:INDEX[r][0] + 8] = b'.' * 8
+    return mailbox
+
+
+_EMPTY_RUN = re.compile(rb'\.+')
+
+
+def to_placement(mailbox: bytearray) -> str:
+    # FEN piece placement straight from the byte rows
+    ranks = []
+    for r in range(8):
+        start = INDEX[r][0]
+        ranks.append(_EMPTY_RUN.sub(lambda m: b'%d' % len(m.group()), mailbox[start:start + 8]))
+    return b'/'.join(ranks).decode('ascii')
+
@@ -1,3 +1,4 @@
+from __future__ import annotations
 
 from dataclasses import dataclass
 
@@ -16,3 +17,158 @@ class Move:
     captured_en_passant_square: Square = None  # square of pawn captured in en passant
     castle_ks: bool = False
     castle_qs: bool = False
+
+
+# Packed integer encoding, for search code that wants to avoid allocating a Move per move.
+#
+#   bits  0-5   source square       (row * 8 + col, a8 = 0 .. h1 = 63)
+#   bits  6-11  destination square
+#   bits 12-14  promotion           (0 none, 1 N, 2 B, 3 R, 4 Q)
+#   bit  15     capture
+#   bit  16     pawn moved two squares
+#   bit  17     en passant
+#   bit  18     castle kingside
+#   bit  19     castle queenside
+#   bits 20-23  moving piece        (index into PIECE_SYMBOLS)
+#
+# The low 16 bits (squares, promotion, capture) identify a move within a position; the flags and
+# piece above them let a packed move be turned back into a full Move without a board.
+
+PIECE_SYMBOLS = "PNBRQKpnbrqk"
+PROMOTION_LETTERS = " NBRQ"
+
+TO_SHIFT = 6
+PROMOTION_SHIFT = 12
+CAPTURE = 1 << 15
+DOUBLE_PUSH = 1 << 16
+EN_PASSANT = 1 << 17
+CASTLE_KS = 1 << 18
+CASTLE_QS = 1 << 19
+PIECE_SHIFT = 20
+
+SQUARE_MASK = 0x3F
+PROMOTION_MASK = 0x7
+
+# captures and promotions, the moves searched first and by quiescence
+TACTICAL = CAPTURE | (PROMOTION_MASK << PROMOTION_SHIFT)
+
+_SQUARES = [(sq // 8, sq % 8) for sq in range(64)]
+
+
+def encode_move(move: Move) -> int:
+    (sr, sc), (dr, dc) = move.source, move.destination
+    packed = (sr * 8 + sc) | ((dr * 8 + dc) << TO_SHIFT) | (PIECE_SYMBOLS.index(move.piece) << PIECE_SHIFT)
+    if move.promotion:
+        packed |= PROMOTION_LETTERS.index(move.promotion.upper()) << PROMOTION_SHIFT
+    if move.capture:
+        packed |= CAPTURE
+    if move.pawn_moved_two_squares:
+        packed |= DOUBLE_PUSH
+    if move.en_passant:
+        packed |= EN_PASSANT
+    if move.castle_ks:
+        packed |= CASTLE_KS
+    if move.castle_qs:
+        packed |= CASTLE_QS
+    return packed
+
+
+def decode_move(packed: int) -> Move:
+    piece = packed >> PIECE_SHIFT
+    promotion = None
+    promo = (packed >> PROMOTION_SHIFT) & PROMOTION_MASK
+    if promo:
+        # black pawns promote to lowercase letters, as chess.pieces.pawn generates them
+        promotion = PROMOTION_LETTERS[promo] if piece < 6 else PROMOTION_LETTERS[promo].lower()
+    captured_en_passant_square = None
+    if packed & EN_PASSANT:
+        # the captured pawn sits beside the mover: source rank, destination file
+        captured_en_passant_square = _SQUARES[(packed & 0x38) | ((packed >> TO_SHIFT) & 0x7)]
+    return Move(_SQUARES[packed & SQUARE_MASK], _SQUARES[(packed >> TO_SHIFT) & SQUARE_MASK],
+                PIECE_SYMBOLS[piece],
+                capture=bool(packed & CAPTURE),
+                pawn_moved_two_squares=bool(packed & DOUBLE_PUSH),
+                promotion=promotion,
+                en_passant=bool(packed & EN_PASSANT),
+                captured_en_passant_square=captured_en_passant_square,
+                castle_ks=bool(packed & CASTLE_KS),
+                castle_qs=bool(packed & CASTLE_QS))
+
+
+class PackedMove:
+    """Read-only view of a packed move with the same attributes as Move.
+
+    It compares and hashes as its int, so it is never equal to a Move: compare int(packed) with
+    encode_move(move), or packed.to_move() with move. The objects backend's make_move wraps packed
+    ints in one of these, and its generator builds Move objects before packing them, so only the
+    bitboard backend handles packed moves without allocating.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    @property
+    def source(self) -> Square:
+        return _SQUARES[self.value & SQUARE_MASK]
+
+    @property
+    def destination(self) -> Square:
+        return _SQUARES[(self.value >> TO_SHIFT) & SQUARE_MASK]
+
+    @property
+    def piece(self) -> str:
+        return PIECE_SYMBOLS[self.value >> PIECE_SHIFT]
+
+    @property
+    def capture(self) -> bool:
+        return bool(self.value & CAPTURE)
+
+    @property
+    def pawn_moved_two_squares(self) -> bool:
+        return bool(self.value & DOUBLE_PUSH)
+
+    @property
+    def promotion(self) -> str | None:
+        promo = (self.value >> PROMOTION_SHIFT) & PROMOTION_MASK
+        if not promo:
+            return None
+        letter = PROMOTION_LETTERS[promo]
+        return letter if self.value >> PIECE_SHIFT < 6 else letter.lower()
+
+    @property
+    def en_passant(self) -> bool:
+        return bool(self.value & EN_PASSANT)
+
+    @property
+    def captured_en_passant_square(self) -> Square:
+        if not self.value & EN_PASSANT:
+            return None
+        return _SQUARES[(self.value & 0x38) | ((self.value >> TO_SHIFT) & 0x7)]
+
+    @property
+    def castle_ks(self) -> bool:
+        return bool(self.value & CASTLE_KS)
+
+    @property
+    def castle_qs(self) -> bool:
+        return bool(self.value & CASTLE_QS)
+
+    def to_move(self) -> Move:
+        return decode_move(self.value)
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __eq__(self, other):
+        if isinstance(other, PackedMove):
+            return self.value == other.value
+        if isinstance(other, int):
+            return self.value == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return f"PackedMove({self.to_move()!r})"
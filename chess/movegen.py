@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from chess.attacks import (KNIGHT_ATTACKS, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS,
+                           ORTHOGONAL_RAYS, DIAGONAL_RAYS)
+
+# Direct legal move generation: pins, checkers and the squares that resolve a check are
+# computed once per position, so no candidate move has to be made and unmade.
+
+Square = tuple[int, int]  # (row, col)
+
+
+def _pins_and_checks(board, white):
+    """Return (checkers, check_mask, pins) for the side `white` about to move.
+
+    check_mask is None when not in check, else the set of squares a non-king move must land on
+    (the checker plus anything in between). pins maps a pinned piece's square to the set of
+    squares it may still move to (along the pin line, including capturing the pinner).
+    """
+    grid = board.board
+    kr, kc = board.get_king(white)
+
+    if white:
+        knight, pawn, bishop, rook, queen = 'n', 'p', 'b', 'r', 'q'
+        pawn_sources = WHITE_PAWN_ATTACKS  # black pawns checking the king sit where a white pawn would attack
+    else:
+        knight, pawn, bishop, rook, queen = 'N', 'P', 'B', 'R', 'Q'
+        pawn_sources = BLACK_PAWN_ATTACKS
+
+    checkers = []
+    check_mask = None
+    pins = {}
+
+    for r, c in KNIGHT_ATTACKS[kr][kc]:
+        piece = grid[r][c]
+        if piece is not None and piece.symbol == knight:
+            checkers.append((r, c))
+            check_mask = {(r, c)}
+
+    for r, c in pawn_sources[kr][kc]:
+        piece = grid[r][c]
+        if piece is not None and piece.symbol == pawn:
+            checkers.append((r, c))
+            check_mask = {(r, c)}
+
+    for rays, slider in ((ORTHOGONAL_RAYS[kr][kc], rook), (DIAGONAL_RAYS[kr][kc], bishop)):
+        for ray in rays:
+            own = None  # square of the first friendly piece on the ray
+            for i, (r, c) in enumerate(ray):
+                piece = grid[r][c]
+                if piece is None:
+                    continue
+                if piece.white == white:
+                    if own is not None:
+                        break  # two friendly pieces: no pin on this ray
+                    own = (r, c)
+                    continue
+                if piece.symbol == slider or piece.symbol == queen:
+                    line = set(ray[:i + 1])
+                    if own is None:
+                        checkers.append((r, c))
+                        check_mask = line
+                    else:
+                        pins[own] = line
+                break
+
+    return checkers, check_mask, pins
+
+
+def _ep_is_legal(board, move, white) -> bool:
+    # En passant removes two pieces from one rank, so test it by editing the grid directly
+    grid = board.board
+    (sr, sc), (dr, dc), (er, ec) = move.source, move.destination, move.captured_en_passant_square
+    pawn, captured = grid[sr][sc], grid[er][ec]
+
+    grid[sr][sc] = None
+    grid[er][ec] = None
+    grid[dr][dc] = pawn
+    try:
+        return not board.is_square_attacked(board.get_king(white), not white)
+    finally:
+        grid[dr][dc] = None
+        grid[er][ec] = captured
+        grid[sr][sc] = pawn
+
+
+def legal_moves(board, captures=None) -> list:
+    # captures=True keeps only captures and promotions, captures=False only the other moves; the
+    # rest are dropped before any legality test
+    white = board.white_to_move
+    king = board.white_king if white else board.black_king
+    king_square = king.location
+    kr, kc = king_square
+
+    checkers, check_mask, pins = _pins_and_checks(board, white)
+    enemy = not white
+    grid = board.board
+
+    moves = []
+    king_moves = king.pseudo_legal_moves()
+
+    # King moves: lift the king off the board so sliders see through its current square
+    grid[kr][kc] = None
+    try:
+        for move in king_moves:
+            if move.castle_ks or move.castle_qs:
+                continue
+            if captures is not None and move.capture != captures:
+                continue
+            if not board.is_square_attacked(move.destination, enemy):
+                moves.append(move)
+    finally:
+        grid[kr][kc] = king
+
+    if len(checkers) > 1:
+        return moves  # double check: only the king may move
+
+    if not checkers and not captures:
+        # King.can_castle_* already refused castling through or into attacked squares
+        for move in king_moves:
+            if move.castle_ks or move.castle_qs:
+                moves.append(move)
+
+    pieces = board.white_objects if white else board.black_objects
+    for piece in pieces:
+        if piece is king:
+            continue
+        pin_line = pins.get(piece.location)
+        for move in piece.pseudo_legal_moves():
+            if captures is not None and (move.capture or move.promotion is not None) != captures:
+                continue
+            if move.en_passant:
+                if _ep_is_legal(board, move, white):
+                    moves.append(move)
+                continue
+            destination = move.destination
+            if check_mask is not None and destination not in check_mask:
+                continue
+            if pin_line is not None and destination not in pin_line:
+                continue
+            moves.append(move)
+
+    return moves
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from chess.move import (PIECE_SYMBOLS, TO_SHIFT, PIECE_SHIFT, PROMOTION_SHIFT, PROMOTION_MASK,
+                        SQUARE_MASK, CAPTURE, EN_PASSANT, TACTICAL)
+
+# Staged move picker for the search. Moves come out in the order a cutoff is most likely:
+#
+#   1. the hash move (from the transposition table or the previous iteration's PV)
+#   2. captures and promotions, most valuable victim / least valuable attacker first
+#   3. killer moves: quiet moves that caused a beta cutoff at the same ply elsewhere in the tree
+#   4. the remaining quiet moves, by history score
+#
+# Each stage is generated only when the previous one is used up, so a cutoff on the hash move
+# generates nothing. On a board with LAZY_CAPTURES (the bitboard backend) a cutoff on a capture
+# never generates the quiet moves; the objects backend's piece generators make every move anyway,
+# so there the captures stage generates all legal moves once and the quiet stage reuses them.
+
+MAX_PLY = 128
+KILLERS = 2
+
+# piece type by symbol, 0 = pawn .. 5 = king, for both colours
+PIECE_TYPE = {symbol: i % 6 for i, symbol in enumerate(PIECE_SYMBOLS)}
+_QUEEN_PROMOTION = 4
+_HISTORY_LIMIT = 1 << 20
+
+
+def mvv_lva(board, move: int) -> int:
+    # capture order score: victim type dominates, cheaper attackers break ties; a queen
+    # promotion ranks with a queen capture
+    score = 0
+    if move & CAPTURE:
+        if move & EN_PASSANT:
+            victim = 0
+        else:
+            to = (move >> TO_SHIFT) & SQUARE_MASK
+            victim = PIECE_TYPE[board.get_piece((to // 8, to % 8)).symbol]
+        score = (victim + 1) * 8 - (move >> PIECE_SHIFT) % 6
+    if (move >> PROMOTION_SHIFT) & PROMOTION_MASK == _QUEEN_PROMOTION:
+        score += 5 * 8
+    return score
+
+
+class MoveOrdering:
+    """Killer and history tables shared by every node of a search."""
+
+    def __init__(self):
+        self.killers = [[0] * KILLERS for _ in range(MAX_PLY)]
+        self.history = [[0] * 64 for _ in range(len(PIECE_SYMBOLS))]
+
+    def new_search(self):
+        # killers are tied to the old tree's plies; history is kept but decayed
+        for slots in self.killers:
+            slots[:] = [0] * KILLERS
+        for row in self.history:
+            row[:] = [value // 2 for value in row]
+
+    def clear(self):
+        self.__init__()
+
+    def cutoff(self, move: int, depth: int, ply: int):
+        # a quiet move failed high: remember it as a killer and credit its history
+        if ply < MAX_PLY:
+            slots = self.killers[ply]
+            if slots[0] != move:
+                slots[1:] = slots[:-1]
+                slots[0] = move
+        row = self.history[move >> PIECE_SHIFT]
+        to = (move >> TO_SHIFT) & SQUARE_MASK
+        row[to] += depth * depth
+        if row[to] > _HISTORY_LIMIT:
+            for row in self.history:
+                row[:] = [value // 2 for value in row]
+
+    def history_score(self, move: int) -> int:
+        return self.history[move >> PIECE_SHIFT][(move >> TO_SHIFT) & SQUARE_MASK]
+
+
+def _plausible(board, move: int) -> bool:
+    # a hash move is only offered for the position whose full key it was stored under; check the
+    # mover is on its square anyway so a key collision cannot corrupt the board
+    src = move & SQUARE_MASK
+    piece = board.get_piece((src // 8, src % 8))
+    return piece is not None and piece.symbol == PIECE_SYMBOLS[move >> PIECE_SHIFT] \
+        and piece.white == board.white_to_move
+
+
+def staged_moves(board, ordering: MoveOrdering, ply: int, hash_move: int = 0):
+    """Yield the legal moves of board as packed ints, best-first and generated lazily.
+
+    The board must be back in the same position whenever the generator is resumed, as it is
+    between make_move/unmake_move pairs in a search.
+    """
+    if hash_move and _plausible(board, hash_move):
+        yield hash_move
+    else:
+        hash_move = 0
+
+    if board.LAZY_CAPTURES:
+        captures = board.packed_legal_moves(captures=True)
+        quiets = None
+    else:
+        moves = board.packed_legal_moves()
+        captures = [move for move in moves if move & TACTICAL]
+        quiets = [move for move in moves if not move & TACTICAL]
+    if captures:
+        captures.sort(key=lambda move: mvv_lva(board, move), reverse=True)
+        for move in captures:
+            if move != hash_move:
+                yield move
+
+    if quiets is None:
+        quiets = board.packed_legal_moves(captures=False)
+    if not quiets:
+        return
+    killers = tuple(ordering.killers[ply]) if ply < MAX_PLY else ()
+    played = []
+    for move in killers:
+        if move and move != hash_move and move in quiets:
+            played.append(move)
+            yield move
+
+    quiets.sort(key=ordering.history_score, reverse=True)
+    for move in quiets:
+        if move != hash_move and move not in played:
+            yield move
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import pickle
+import struct
+import sys
+
+from chess.fen import parse_placement, alg_to_rc, rc_to_alg, from_fen, to_fen
+from chess.move import PIECE_SYMBOLS, encode_move
+
+try:
+    import numpy as np
+except ImportError:  # optional: only the array views need it
+    np = None
+
+# Fixed-size binary positions, and files of them that are read through mmap.
+#
+# A packed position is RECORD_SIZE (36) bytes:
+#   bytes 0-31  one nibble per square, square index row * 8 + col (a8 = 0), the even square in the
+#               low nibble; 0 is empty, 1-12 are PIECE_SYMBOLS ("PNBRQKpnbrqk") plus one
+#   bytes 32-35 little-endian state word:
+#               bit 0 white to move, bits 1-4 castling rights (KQkq, the chess.zobrist bits),
+#               bits 5-8 en passant file + 1 (0 for none), bits 9-16 half-move clock,
+#               bits 17-31 full-move number
+# The en passant square is kept as the board has it, capturable or not, so a position comes back
+# with the same FEN it went in with.
+#
+# A dataset file is a HEADER_SIZE (32) byte header (MAGIC, format version, record size, record
+# count) followed by the records back to back. PackedDataset maps the file and hands out records,
+# boards, or zero-copy NumPy views of any slice.
+
+RECORD_SIZE = 36
+HEADER_SIZE = 32
+MAGIC = b"CHESSPOS"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIQ8x")  # magic, version, record size, reserved, count
+_STATE = struct.Struct("<I")
+
+MAX_HALF_MOVES = 0xFF
+MAX_FULL_MOVES = 0x7FFF
+
+CASTLING_LETTERS = "KQkq"
+
+_CODES = {symbol: i + 1 for i, symbol in enumerate(PIECE_SYMBOLS)}
+_SYMBOLS = "." + PIECE_SYMBOLS  # nibble -> symbol
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([("squares", np.uint8, 32), ("state", "<u4")])
+else:
+    RECORD_DTYPE = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("the array views in chess.packed need numpy; install it with `pip install numpy`")
+
+
+def pack_fen(fen: str) -> bytes:
+    """The packed record for a FEN. Raises ValueError if it is malformed or out of range."""
+    fields = fen.split()
+    if len(fields) != 6:
+        raise ValueError("FEN must have 6 fields")
+    placement, active, castling, ep, half, full = fields
+
+    nibbles = [0] * 64
+    for (row, col), symbol in parse_placement(placement):
+        nibbles[row * 8 + col] = _CODES[symbol]
+    half, full = int(half), int(full)
+    if not 0 <= half <= MAX_HALF_MOVES or not 0 <= full <= MAX_FULL_MOVES:
+        raise ValueError(f"move clocks out of range for a packed position: {half} {full}")
+
+    state = active == "w"
+    for bit, letter in enumerate(CASTLING_LETTERS):
+        if letter in castling:
+            state |= 2 << bit
+    if ep != "-":
+        state |= (alg_to_rc(ep)[1] + 1) << 5
+    state |= half << 9 | full << 17
+
+    squares = bytes(nibbles[i] | nibbles[i + 1] << 4 for i in range(0, 64, 2))
+    return squares + _STATE.pack(state)
+
+
+def unpack_fen(data) -> str:
+    """The FEN of a packed record (bytes, memoryview or a dataset slice)."""
+    if len(data) != RECORD_SIZE:
+        raise ValueError(f"packed position must be {RECORD_SIZE} bytes, not {len(data)}")
+    ranks = []
+    for row in range(8):
+        rank, empty = "", 0
+        for byte in data[row * 4:row * 4 + 4]:
+            for nibble in (byte & 15, byte >> 4):
+                if nibble == 0:
+                    empty += 1
+                    continue
+                if nibble > 12:
+                    raise ValueError(f"bad piece code {nibble} in packed position")
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += _SYMBOLS[nibble]
+        ranks.append(rank + (str(empty) if empty else ""))
+
+    state, = _STATE.unpack_from(data, 32)
+    white = state & 1
+    castling = "".join(letter for bit, letter in enumerate(CASTLING_LETTERS) if state & (2 << bit))
+    ep_file = (state >> 5 & 15) - 1
+    ep = "-" if ep_file < 0 else rc_to_alg((2 if white else 5, ep_file))
+    return (f"{'/'.join(ranks)} {'w' if white else 'b'} {castling or '-'} {ep} "
+            f"{state >> 9 & MAX_HALF_MOVES} {state >> 17}")
+
+
+def to_packed(board) -> bytes:
+    # Board.to_packed: castling rights as to_fen reports them, en passant square as stored
+    return pack_fen(to_fen(board))
+
+
+def load_packed(board, data) -> None:
+    # load a packed record into board, replacing its position (as from_fen does)
+    from_fen(board, unpack_fen(data))
+
+
+def reduce_board(board):
+    # __reduce__ for both backends: the start FEN of the game and its moves as packed ints
+    start = board.copy()
+    for _ in board.history:
+        start.unmake_move()
+    moves = [move if type(move) is int else encode_move(move) for move in board.history]
+    return type(board)._from_history, (to_fen(start), moves)
+
+
+# --- dataset files ---------------------------------------------------------------------------
+
+
+class PackedWriter:
+    """Append packed positions to a new dataset file; the header count is filled in on close."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._f = open(path, "wb")
+        self._f.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, 0))
+
+    def write(self, record: bytes):
+        if len(record) != RECORD_SIZE:
+            raise ValueError(f"packed position must be {RECORD_SIZE} bytes, not {len(record)}")
+        self._f.write(record)
+        self.count += 1
+
+    def write_board(self, board):
+        self.write(to_packed(board))
+
+    def write_fen(self, fen: str):
+        self.write(pack_fen(fen))
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, self.count))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_fens(path: str, fens) -> int:
+    """Pack a sequence or stream of FEN lines into a dataset file; returns the record count."""
+    with PackedWriter(path) as writer:
+        for fen in fens:
+            fen = fen.strip()
+            if fen:
+                writer.write_fen(fen)
+    return writer.count
+
+
+class PackedDataset:
+    """Read-only random access to a dataset file through mmap; nothing is loaded up front."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER_SIZE:
+            raise ValueError(f"{path}: too short for a packed dataset header")
+        magic, version, record_size, _, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a packed position dataset")
+        if version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path}: unsupported format version {version} (record size {record_size})")
+        if HEADER_SIZE + count * RECORD_SIZE > len(self._mm):
+            raise ValueError(f"{path}: truncated, header says {count} records")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i: int) -> memoryview:
+        # the raw bytes of record i, without copying
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start = HEADER_SIZE + i * RECORD_SIZE
+        return memoryview(self._mm)[start:start + RECORD_SIZE]
+
+    def fen(self, i: int) -> str:
+        return unpack_fen(self.record(i))
+
+    def board(self, i: int, backend: str = "objects"):
+        from chess.board import Board
+        return Board.from_packed(self.record(i), backend)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.fen(i)
+
+    def records(self, start: int = 0, stop: int | None = None) -> "np.ndarray":
+        """Structured array (RECORD_DTYPE) over records start:stop, a view of the mapped file."""
+        _require_numpy()
+        start, stop, _ = slice(start, stop).indices(self.count)
+        return np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=max(0, stop - start),
+                             offset=HEADER_SIZE + start * RECORD_SIZE)
+
+    def batch(self, start: int = 0, stop: int | None = None):
+        """Records start:stop decoded into a chess.batch.PositionBatch (this one copies)."""
+        return decode_records(self.records(start, stop))
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode_records(records: "np.ndarray"):
+    """A chess.batch.PositionBatch for a RECORD_DTYPE array, with no per-position Python work."""
+    from chess.batch import PositionBatch, EMPTY_INDEX, _drop_uncapturable_ep
+    _require_numpy()
+    n = len(records)
+    squares = records["squares"]
+    codes = np.empty((n, 64), dtype=np.uint8)
+    codes[:, 0::2] = squares & 15
+    codes[:, 1::2] = squares >> 4
+    pieces = np.where(codes == 0, EMPTY_INDEX, codes - 1).astype(np.uint8)
+
+    state = records["state"]
+    white_to_move = (state & 1).astype(bool)
+    castling = ((state[:, None] >> np.arange(1, 5, dtype=np.uint32)) & 1).astype(np.uint8)
+    ep_file = ((state >> 5) & 15).astype(np.int8) - 1
+    _drop_uncapturable_ep(pieces, white_to_move, ep_file)
+    half = ((state >> 9) & MAX_HALF_MOVES).astype(np.int32)
+    full = (state >> 17).astype(np.int32)
+    return PositionBatch(pieces, white_to_move, castling, ep_file, half, full)
+
+
+# (FEN, moves in UCI) for self_check: a played game is pickled and copied, then a second FEN is loaded
+# into the played board (which must drop the old game) and that is pickled and copied too
+SELF_CHECK_GAME = ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                   "e2e4 d7d5 e4d5 g8f6 f1b5 c7c6 d5c6 d8b6 c6b7 e8d8 b7a8q")
+SELF_CHECK_RELOAD = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+def self_check(backend: str = "bitboard") -> list[str]:
+    """Round-trip boards through pack/unpack, copy() and pickle; returns a description of every failure."""
+    from chess.board import Board
+    from chess.uci import parse_uci_move
+
+    problems = []
+
+    def compare(what, board, other):
+        if to_fen(other) != to_fen(board) or other.zobrist_key != board.zobrist_key:
+            problems.append(f"{what}: {to_fen(other)}, expected {to_fen(board)}")
+        elif len(other.history) != len(board.history):
+            problems.append(f"{what}: {len(other.history)} moves of history, expected {len(board.history)}")
+        else:
+            # history must unmake back to where the board's own game started
+            for _ in range(len(board.history)):
+                other.unmake_move()
+            start = board.copy()
+            for _ in range(len(board.history)):
+                start.unmake_move()
+            if to_fen(other) != to_fen(start):
+                problems.append(f"{what}: unmakes to {to_fen(other)}, expected {to_fen(start)}")
+
+    fen, moves = SELF_CHECK_GAME
+    board = Board.from_fen(fen, backend)
+    for text in moves.split():
+        board.make_move(parse_uci_move(board, text))
+    for stage in ("played", "reloaded"):
+        if stage == "reloaded":
+            from_fen(board, SELF_CHECK_RELOAD)
+            if board.history:
+                problems.append(f"reloaded: {len(board.history)} moves of history left from the old game")
+        if unpack_fen(to_packed(board)) != to_fen(board):
+            problems.append(f"{stage}: packs as {unpack_fen(to_packed(board))}, expected {to_fen(board)}")
+        for what, make in (("copy", board.copy), ("pickle", lambda: pickle.loads(pickle.dumps(board)))):
+            try:
+                compare(f"{stage} {what}", board, make())
+            except Exception as e:
+                problems.append(f"{stage} {what}: {e!r}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert between FEN files and packed position datasets.")
+    parser.add_argument("input", nargs="?")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--to-fen", action="store_true", help="unpack a dataset to FEN lines instead")
+    parser.add_argument("--self-check", action="store_true",
+                        help="round-trip boards through packing, copy() and pickle on both backends and exit")
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        problems = []
+        for backend in ("objects", "bitboard"):
+            problems += [f"{backend}: {problem}" for problem in self_check(backend)]
+        for problem in problems:
+            print(problem)
+        print(f"self-check: {len(problems)} problems")
+        return 1 if problems else 0
+    if args.output is None:
+        parser.error("input and output are required")
+
+    if args.to_fen:
+        with PackedDataset(args.input) as dataset, open(args.output, "w", encoding="utf-8") as out:
+            for fen in dataset:
+                out.write(fen + "\n")
+            print(f"{len(dataset)} positions unpacked")
+        return 0
+
+    with open(args.input, encoding="utf-8") as src:
+        count = write_fens(args.output, src)
+    print(f"{count} positions packed ({HEADER_SIZE + count * RECORD_SIZE} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
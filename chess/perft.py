@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from chess.fen import to_fen, rc_to_alg
+from chess.move import decode_move
+
+# Perft: count the leaf nodes of the legal move tree to a fixed depth. The counts for the standard
+# positions are known exactly, so perft both validates the rules and measures move generation.
+
+# name -> (FEN, {depth: known node count})
+POSITIONS = {
+    "start": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                   {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                    {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                    {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+                    {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    "position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                    {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+
+    # en passant, castling and promotion edge cases; the deepest count is the published one, the
+    # shallower ones were produced by both backends while matching it
+    "illegal_ep_1": ("3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1",
+                     {1: 18, 2: 92, 3: 1670, 4: 10138, 5: 185429, 6: 1134888}),
+    "illegal_ep_2": ("8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1",
+                     {1: 13, 2: 102, 3: 1266, 4: 10276, 5: 135655, 6: 1015133}),
+    "ep_gives_check": ("8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1",
+                       {1: 15, 2: 126, 3: 1928, 4: 13931, 5: 206379, 6: 1440467}),
+    "short_castle_check": ("5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+                           {1: 15, 2: 66, 3: 1198, 4: 6399, 5: 120330, 6: 661072}),
+    "long_castle_check": ("3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+                          {1: 16, 2: 71, 3: 1286, 4: 7418, 5: 141077, 6: 803711}),
+    "castle_rights": ("r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+                      {1: 26, 2: 1141, 3: 27826, 4: 1274206}),
+    "castle_prevented": ("r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+                         {1: 44, 2: 1494, 3: 50509, 4: 1720476}),
+    "promote_out_of_check": ("2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1",
+                             {1: 11, 2: 133, 3: 1442, 4: 19174, 5: 266199, 6: 3821001}),
+    "discovered_check": ("8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1",
+                         {1: 29, 2: 165, 3: 5160, 4: 31961, 5: 1004658}),
+    "promote_to_check": ("4k3/1P6/8/8/8/8/K7/8 w - - 0 1",
+                         {1: 9, 2: 40, 3: 472, 4: 2661, 5: 38983, 6: 217342}),
+    "underpromote_to_check": ("8/P1k5/K7/8/8/8/8/8 w - - 0 1",
+                              {1: 6, 2: 27, 3: 273, 4: 1329, 5: 18135, 6: 92683}),
+    "self_stalemate": ("K1k5/8/P7/8/8/8/8/8 w - - 0 1",
+                       {1: 2, 2: 6, 3: 13, 4: 63, 5: 382, 6: 2217}),
+    "stalemate_checkmate_1": ("8/k1P5/8/1K6/8/8/8/8 w - - 0 1",
+                              {1: 10, 2: 25, 3: 268, 4: 926, 5: 10857, 6: 43261, 7: 567584}),
+    "stalemate_checkmate_2": ("8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1",
+                              {1: 37, 2: 183, 3: 6559, 4: 23527}),
+}
+
+# positions and depths the default benchmark run covers
+QUICK = {"start": 3, "kiwipete": 2, "position3": 3, "position4": 3, "position5": 2, "position6": 2}
+
+
+def move_to_uci(move) -> str:
+    # long algebraic / UCI notation, e.g. e2e4, e7e8q
+    promotion = (move.promotion or "").lower()
+    return f"{rc_to_alg(move.source)}{rc_to_alg(move.destination)}{promotion}"
+
+
+def perft(board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    moves = board.packed_legal_moves()
+    if depth == 1:
+        return len(moves)  # bulk count the last ply
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth: int) -> dict[str, int]:
+    # perft split by root move, keyed by UCI move string
+    counts = {}
+    for move in board.packed_legal_moves():
+        board.make_move(move)
+        counts[move_to_uci(decode_move(move))] = perft(board, depth - 1) if depth > 1 else 1
+        board.unmake_move()
+    return counts
+
+
+def _new_board(fen: str, backend: str):
+    from chess.board import Board  # chess.board imports this module
+
+    return Board.from_fen(fen, backend)
+
+
+def _perft_paths(fen: str, backend: str, paths: list[tuple[int, ...]], depth: int) -> list[int]:
+    # worker task: boards hold back-referenced piece objects, so each worker rebuilds its own
+    # position from FEN once, then replays the packed moves leading to each of its subtrees
+    board = _new_board(fen, backend)
+    counts = []
+    for path in paths:
+        for move in path:
+            board.make_move(move)
+        counts.append(perft(board, depth - len(path)))
+        for _ in path:
+            board.unmake_move()
+    return counts
+
+
+def parallel_divide(board, depth: int, workers: int | None = None, split_depth: int = 1) -> dict[str, int]:
+    """divide() with the subtrees spread over a process pool.
+
+    split_depth=1 makes one task per root move; split_depth=2 one per root move and reply, which
+    balances better when a few root moves dominate the tree.
+    """
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+    split_depth = max(1, min(split_depth, depth))
+    fen = to_fen(board)
+    backend = getattr(board, "backend", "objects")
+
+    # enumerate the split points in the parent process
+    paths = []
+    for move in board.packed_legal_moves():
+        if split_depth == 1:
+            paths.append((move,))
+            continue
+        board.make_move(move)
+        replies = board.packed_legal_moves()
+        board.unmake_move()
+        if replies:
+            paths.extend((move, reply) for reply in replies)
+        else:
+            paths.append((move,))  # mate or stalemate after the root move: a single leaf
+
+    # a few chunks per worker keeps the pool busy without rebuilding the board per subtree
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(paths) // (workers * 4))
+    chunks = [paths[i:i + chunk] for i in range(0, len(paths), chunk)]
+
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_perft_paths, fen, backend, paths, depth) for paths in chunks]
+        for paths, future in zip(chunks, futures):
+            for path, nodes in zip(paths, future.result()):
+                key = move_to_uci(decode_move(path[0]))
+                counts[key] = counts.get(key, 0) + nodes
+    return counts
+
+
+def parallel_perft(board, depth: int, workers: int | None = None, split_depth: int = 1) -> int:
+    return sum(parallel_divide(board, depth, workers, split_depth).values())
+
+
+def run_scaling(name: str, depth: int, worker_counts, backend: str = "objects", split_depth: int = 1,
+                out=sys.stdout) -> list[dict]:
+    # time parallel perft per worker count and report speedup against a serial run
+    serial = run_position(name, depth, backend)
+    print(f"{name:<24} d={depth} serial nodes={serial['nodes']} time={serial['seconds']:.3f}s", file=out)
+
+    results = []
+    for workers in worker_counts:
+        board = _new_board(POSITIONS[name][0], backend)
+        start = time.perf_counter()
+        nodes = parallel_perft(board, depth, workers, split_depth)
+        seconds = time.perf_counter() - start
+        speedup = serial["seconds"] / seconds if seconds > 0 else None
+        results.append({
+            "position": name,
+            "backend": backend,
+            "depth": depth,
+            "workers": workers,
+            "split_depth": split_depth,
+            "nodes": nodes,
+            "ok": nodes == serial["nodes"],
+            "seconds": round(seconds, 6),
+            "nps": round(nodes / seconds) if seconds > 0 else None,
+            "speedup": round(speedup, 3) if speedup else None,
+        })
+        print(f"{name:<24} d={depth} workers={workers:<3} time={seconds:.3f}s "
+              f"speedup={speedup or 0:.2f}x {'ok' if nodes == serial['nodes'] else 'MISMATCH'}", file=out)
+    return results
+
+
+def run_position(name: str, depth: int, backend: str = "objects") -> dict:
+    fen, known = POSITIONS[name]
+    board = _new_board(fen, backend)
+
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    seconds = time.perf_counter() - start
+
+    expected = known.get(depth)
+    return {
+        "position": name,
+        "fen": fen,
+        "backend": backend,
+        "depth": depth,
+        "nodes": nodes,
+        "expected": expected,
+        "ok": None if expected is None else nodes == expected,
+        "seconds": round(seconds, 6),
+        "nps": round(nodes / seconds) if seconds > 0 else None,
+    }
+
+
+def run_benchmark(depths: dict[str, int], backend: str = "objects", out=sys.stdout) -> dict:
+    # run each position from depth 1 up to its requested depth and report as we go
+    results = []
+    for name, max_depth in depths.items():
+        for depth in range(1, max_depth + 1):
+            result = run_position(name, depth, backend)
+            results.append(result)
+            status = {True: "ok", False: "MISMATCH", None: "-"}[result["ok"]]
+            print(f"{name:<24} d={depth} nodes={result['nodes']:<10} nps={result['nps'] or 0:<9} "
+                  f"time={result['seconds']:.3f}s {status}", file=out)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "backend": backend,
+        "results": results,
+        "ok": all(r["ok"] is not False for r in results),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Perft benchmark over the standard positions.")
+    parser.add_argument("--backend", default="objects", choices=("objects", "bitboard"))
+    parser.add_argument("--positions", nargs="*", default=None,
+                        help=f"position names (default: {' '.join(QUICK)})")
+    parser.add_argument("--depth", type=int, default=None,
+                        help="maximum depth; defaults to the quick depth, or the deepest known count")
+    parser.add_argument("--workers", type=int, nargs="*", default=None,
+                        help="run parallel perft at the maximum depth with each of these worker counts")
+    parser.add_argument("--split", type=int, default=1, choices=(1, 2),
+                        help="plies to split across workers (default 1)")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results as JSON here")
+    args = parser.parse_args(argv)
+
+    names = args.positions or list(QUICK)
+    depths = {}
+    for name in names:
+        if name not in POSITIONS:
+            parser.error(f"unknown position {name!r}")
+        depths[name] = args.depth or QUICK.get(name) or max(POSITIONS[name][1])
+
+    report = run_benchmark(depths, args.backend)
+    if args.workers:
+        report["scaling"] = []
+        for name, depth in depths.items():
+            report["scaling"] += run_scaling(name, depth, args.workers, args.backend, args.split)
+        report["ok"] = report["ok"] and all(r["ok"] for r in report["scaling"])
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import argparse
+import io
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+
+from chess.board import Board
+from chess.fen import to_fen
+from chess.san import parse_san_to_move, moves_to_san
+
+# Streaming PGN reader. The input is read in fixed-size chunks and split into lines; one game's
+# lines are buffered at a time, so memory stays flat however large the archive is. Each game
+# comes out as a PgnGame holding its tag pairs and mainline SAN; comments, NAGs, move numbers
+# and variations are dropped while tokenizing.
+#
+# A game that cannot be parsed or replayed is not an error for the stream: it is yielded with
+# `error` set (and counted in PgnStats.malformed) so callers can skip it and carry on.
+#
+# PgnWriter goes the other way, for exporting engine games: moves (Move objects or packed ints)
+# become SAN through chess.san.moves_to_san, which generates legal moves once per ply.
+
+DEFAULT_CHUNK = 1 << 20
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+_TAG = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]\s*$')
+
+_TOKEN = re.compile(r"""
+    (?P<comment>\{[^}]*\}?)       # brace comment (unterminated runs to the end)
+  | (?P<line_comment>;[^\n]*)     # rest-of-line comment
+  | (?P<nag>\$\d+)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<result>1-0|0-1|1/2-1/2|\*)
+  | (?P<number>\d+\.+)            # move number: 12. or 12...
+  | (?P<move>[^\s{}();$]+)
+""", re.VERBOSE)
+
+_SUFFIX = re.compile(r"[!?]+$")  # move assessments written inline, e.g. Nf3!? (a NAG in disguise)
+
+# tags every exported game carries, in this order, with their "unknown" values
+SEVEN_TAG_ROSTER = (("Event", "?"), ("Site", "?"), ("Date", "????.??.??"), ("Round", "?"),
+                    ("White", "?"), ("Black", "?"), ("Result", "*"))
+LINE_WIDTH = 80
+
+# games for `python -m chess.pgn --self-check`, with the SAN real archives use that a reader must
+# not trip on: castling with check and mate, promotion, en passant, a FEN start
+SAMPLE_PGN = """\
+[Event "London"]
+[White "Edward Lasker"]
+[Black "George Alan Thomas"]
+[Result "1-0"]
+
+1. d4 e6 2. Nf3 f5 3. Nc3 Nf6 4. Bg5 Be7 5. Bxf6 Bxf6 6. e4 fxe4 7. Nxe4 b6 8. Ne5 O-O
+9. Bd3 Bb7 10. Qh5 Qe7 11. Qxh7+ Kxh7 12. Nxf6+ Kh6 13. Neg4+ Kg5 14. h4+ Kf4 15. g3+ Kf3
+16. Be2+ Kg2 17. Rh2+ Kg1 18. O-O-O# 1-0
+
+[Event "?"]
+[SetUp "1"]
+[FEN "5k2/8/8/8/8/8/8/4K2R w K - 0 1"]
+[Result "*"]
+
+1. O-O+ Ke7 2. Rf7+ Kxf7 *
+
+[Event "?"]
+[SetUp "1"]
+[FEN "4k3/1P6/8/3pP3/8/8/8/4K3 w - d6 0 1"]
+[Result "*"]
+
+1. exd6 Kd7 2. b8=N+ Kxd6 *
+"""
+
+# final positions of the SAMPLE_PGN games
+SAMPLE_FENS = (
+    "rn3r2/pbppq1p1/1p2pN2/8/3P2NP/6P1/PPP1BP1R/2KR2k1 b - - 6 18",
+    "8/5k2/8/8/8/8/8/6K1 w - - 0 3",
+    "1N6/8/3k4/8/8/8/8/4K3 w - - 0 3",
+)
+
+# castling written as the king's move, which both SAN resolvers accept: (FEN, SAN, castling it names)
+SAMPLE_KING_CASTLES = (
+    ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "Kg1", "O-O"),
+    ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "Kc1", "O-O-O"),
+    ("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "Kg8", "O-O"),
+    ("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "Kc8", "O-O-O"),
+)
+
+
+@dataclass
+class PgnGame:
+    headers: dict[str, str] = field(default_factory=dict)
+    moves: list[str] = field(default_factory=list)  # mainline SAN, in order
+    result: str | None = None  # game termination marker from the movetext
+    line: int = 0  # line number where the game starts, for reports
+    error: str | None = None  # set when the game is malformed; skip it
+
+    @property
+    def malformed(self) -> bool:
+        return self.error is not None
+
+
+@dataclass
+class PgnStats:
+    games: int = 0
+    malformed: int = 0
+    moves: int = 0
+    seconds: float = 0.0
+
+    @property
+    def games_per_sec(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def moves_per_sec(self) -> float:
+        return self.moves / self.seconds if self.seconds > 0 else 0.0
+
+    def report(self) -> str:
+        return (f"{self.games} games ({self.malformed} malformed), {self.moves} moves in "
+                f"{self.seconds:.2f}s: {self.games_per_sec:.1f} games/s, {self.moves_per_sec:.0f} moves/s")
+
+
+def _lines(f, chunk_size):
+    # lines of a text stream, read chunk_size characters at a time
+    tail = ""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def _game_texts(lines):
+    # (first line number, tag lines, movetext lines) per game
+    number = 0
+    start = 0
+    tags, movetext = [], []
+    in_comment = False
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r")
+        if line.startswith("%"):  # escape mechanism: the line is not PGN
+            continue
+        stripped = line.strip()
+        if not in_comment and stripped.startswith("["):
+            if movetext:
+                yield start, tags, movetext
+                tags, movetext = [], []
+            if not tags:
+                start = number
+            tags.append(stripped)
+            continue
+        if not stripped:
+            continue
+        if not tags and not movetext:
+            start = number
+        movetext.append(line)
+        if in_comment or "{" in line:
+            in_comment = _still_in_comment(line, in_comment)
+    if tags or movetext:
+        yield start, tags, movetext
+
+
+def _still_in_comment(line, in_comment):
+    # track a brace comment across lines, so a "[" line inside one is not taken for a new game
+    i = 0
+    while True:
+        if in_comment:
+            i = line.find("}", i)
+            if i < 0:
+                return True
+            in_comment = False
+        else:
+            brace = line.find("{", i)
+            semicolon = line.find(";", i)
+            if brace < 0 or 0 <= semicolon < brace:
+                return False
+            i = brace
+            in_comment = True
+        i += 1
+
+
+def parse_game(start, tags, movetext) -> PgnGame:
+    game = PgnGame(line=start)
+    for tag in tags:
+        m = _TAG.match(tag)
+        if not m:
+            game.error = f"bad tag pair {tag!r}"
+            continue
+        game.headers[m.group(1)] = m.group(2).replace('\\"', '"').replace("\\\\", "\\")
+
+    depth = 0
+    for m in _TOKEN.finditer("\n".join(movetext)):
+        kind = m.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+            if depth < 0:
+                game.error = game.error or "unbalanced ')'"
+                depth = 0
+        elif depth:
+            continue  # inside a variation
+        elif kind == "move":
+            if game.result is not None:
+                game.error = game.error or f"move {m.group()!r} after the result"
+            game.moves.append(_SUFFIX.sub("", m.group()))
+        elif kind == "result":
+            game.result = m.group()
+        elif kind == "comment" and not m.group().endswith("}"):
+            game.error = game.error or "unterminated comment"
+    if depth:
+        game.error = game.error or "unterminated variation"
+    if not tags and not game.moves:
+        game.error = game.error or "no tags and no moves"
+    return game
+
+
+def read_games(source, chunk_size: int = DEFAULT_CHUNK):
+    """Yield one PgnGame at a time from a path or a text stream."""
+    if isinstance(source, str):
+        with open(source, encoding="utf-8", errors="replace") as f:
+            yield from read_games(f, chunk_size)
+        return
+    for start, tags, movetext in _game_texts(_lines(source, chunk_size)):
+        yield parse_game(start, tags, movetext)
+
+
+def replay(game: PgnGame, backend: str = "objects", reference=False) -> Board:
+    """Play the mainline of game on a new board and return it. Raises ValueError on a bad move.
+
+    reference=True resolves SAN against the full legal move list (see parse_san_to_move).
+    """
+    fen = game.headers.get("FEN")
+    board = Board.from_fen(fen, backend) if fen else Board(backend=backend)
+    for ply, san in enumerate(game.moves, 1):
+        try:
+            move = parse_san_to_move(board, san, reference)
+        except ValueError as e:
+            raise ValueError(f"ply {ply} ({san}): {e}") from None
+        board.make_move(move)
+    return board
+
+
+def replay_games(source, backend: str = "bitboard", stats: PgnStats | None = None,
+                 chunk_size: int = DEFAULT_CHUNK):
+    """Yield (game, board) for every game, board being the final position of its mainline.
+
+    Malformed games come out with game.error set and board None. Pass a PgnStats to have it
+    filled in as the stream goes.
+    """
+    stats = stats if stats is not None else PgnStats()
+    start = time.perf_counter()
+    for game in read_games(source, chunk_size):
+        board = None
+        if game.error is None:
+            try:
+                board = replay(game, backend)
+            except ValueError as e:
+                game.error = str(e)
+        stats.games += 1
+        if game.error is None:
+            stats.moves += len(game.moves)
+        else:
+            stats.malformed += 1
+        stats.seconds = time.perf_counter() - start
+        yield game, board
+
+
+class PgnWriter:
+    """Write games to a text stream as export-format PGN, one write() call per game."""
+
+    def __init__(self, out, backend: str = "bitboard"):
+        self.out = out
+        self.backend = backend
+        self.games = 0
+
+    def write(self, moves, headers: dict[str, str] | None = None):
+        # moves are played from the FEN tag's position if there is one, else from the start
+        headers = dict(headers or {})
+        if headers.get("FEN"):
+            board = Board.from_fen(headers["FEN"], self.backend)
+            headers["SetUp"] = "1"
+        else:
+            board = Board(backend=self.backend)
+
+        tokens = []
+        number = board.full_move_number
+        if not board.white_to_move:
+            tokens.append(f"{number}...")
+        for san in moves_to_san(board, moves):
+            if not board.white_to_move:  # the move just played was white's
+                tokens.append(f"{number}.")
+            else:
+                number += 1
+            tokens.append(san)
+        tokens.append(headers.get("Result", "*"))
+
+        lines = [f'[{tag} "{_escape(headers.pop(tag, default))}"]' for tag, default in SEVEN_TAG_ROSTER]
+        lines += [f'[{tag} "{_escape(value)}"]' for tag, value in headers.items()]
+        lines.append("")
+        lines += _wrap(tokens)
+        lines.append("")
+        self.out.write("\n".join(lines) + "\n")
+        self.games += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _wrap(tokens) -> list[str]:
+    # movetext lines of at most LINE_WIDTH characters, "1. e4" kept together
+    lines, line = [], ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_WIDTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    if line:
+        lines.append(line)
+    return lines
+
+
+def write_games(target, games, backend: str = "bitboard") -> int:
+    """Write (headers, moves) pairs to a path or text stream; returns the number of games."""
+    if isinstance(target, str):
+        with open(target, "w", encoding="utf-8") as f:
+            return write_games(f, games, backend)
+    writer = PgnWriter(target, backend)
+    for headers, moves in games:
+        writer.write(moves, headers)
+    return writer.games
+
+
+def compare_san(source, backend: str = "bitboard", chunk_size: int = DEFAULT_CHUNK) -> dict:
+    """Replay every game twice, with targeted and with full-list SAN resolution, and time both.
+
+    Both must agree on every game (the same final position, or both rejecting it).
+    """
+    report = {"games": 0, "moves": 0, "targeted_seconds": 0.0, "reference_seconds": 0.0,
+              "mismatches": 0}
+    for game in read_games(source, chunk_size):
+        if game.error:
+            continue
+        results = []
+        for reference in (False, True):
+            start = time.perf_counter()
+            try:
+                results.append(replay(game, backend, reference).zobrist_key)
+            except ValueError as e:
+                results.append(str(e))
+            report["reference_seconds" if reference else "targeted_seconds"] += time.perf_counter() - start
+        report["games"] += 1
+        report["moves"] += len(game.moves)
+        report["mismatches"] += results[0] != results[1]
+    targeted = report["targeted_seconds"]
+    report["speedup"] = report["reference_seconds"] / targeted if targeted > 0 else 0.0
+    return report
+
+
+def self_check(backend: str = "bitboard") -> list[str]:
+    """Replay SAMPLE_PGN with both SAN resolvers and compare the final positions with SAMPLE_FENS,
+    then write each game with PgnWriter and read it back: the SAN must come out as it went in.
+    Castling written as a king move (SAMPLE_KING_CASTLES) must resolve to the castling.
+
+    Returns a description of every failure; an empty list means the reader and writer are sound.
+    """
+    problems = []
+    games = list(read_games(io.StringIO(SAMPLE_PGN)))
+    if len(games) != len(SAMPLE_FENS):
+        return [f"read {len(games)} sample games, expected {len(SAMPLE_FENS)}"]
+    for number, (game, expected) in enumerate(zip(games, SAMPLE_FENS), 1):
+        if game.error:
+            problems.append(f"game {number}: {game.error}")
+            continue
+        failed = len(problems)
+        for reference in (False, True):
+            try:
+                fen = to_fen(replay(game, backend, reference))
+            except ValueError as e:
+                fen = str(e)
+            if fen != expected:
+                problems.append(f"game {number} ({'full list' if reference else 'targeted'}): "
+                                f"ended in {fen}, expected {expected}")
+        if len(problems) > failed:
+            continue
+
+        out = io.StringIO()
+        PgnWriter(out, backend).write(replay(game, backend).history, game.headers)
+        written, = read_games(io.StringIO(out.getvalue()))
+        if written.moves != game.moves:
+            problems.append(f"game {number}: written as {' '.join(written.moves)!r}")
+
+    for fen, san, castling in SAMPLE_KING_CASTLES:
+        board = Board.from_fen(fen, backend)
+        expected = parse_san_to_move(board, castling)
+        for reference in (False, True):
+            try:
+                move = parse_san_to_move(board, san, reference)
+            except ValueError as e:
+                move = str(e)
+            if move != expected:
+                problems.append(f"{san} in {fen} ({'full list' if reference else 'targeted'}): "
+                                f"{move}, expected {castling}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Parse and replay PGN files, reporting throughput.")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--backend", default="bitboard", choices=Board.BACKENDS)
+    parser.add_argument("--no-replay", action="store_true", help="parse only")
+    parser.add_argument("--errors", action="store_true", help="list malformed games")
+    parser.add_argument("--compare-san", action="store_true",
+                        help="benchmark targeted SAN resolution against the full legal-move filter")
+    parser.add_argument("--self-check", action="store_true", help="replay the built-in sample games and exit")
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        problems = self_check(args.backend)
+        for problem in problems:
+            print(problem)
+        print(f"self-check: {len(problems)} problems ({args.backend})")
+        return 1 if problems else 0
+    if not args.files:
+        parser.error("no PGN files given")
+
+    if args.compare_san:
+        ok = True
+        for path in args.files:
+            r = compare_san(path, args.backend)
+            print(f"{path}: {r['games']} games, {r['moves']} moves: targeted {r['targeted_seconds']:.2f}s, "
+                  f"full list {r['reference_seconds']:.2f}s ({r['speedup']:.1f}x), "
+                  f"{r['mismatches']} mismatches")
+            ok = ok and not r["mismatches"]
+        return 0 if ok else 1
+
+    for path in args.files:
+        stats = PgnStats()
+        if args.no_replay:
+            start = time.perf_counter()
+            games = ((game, None) for game in read_games(path))
+        else:
+            games = replay_games(path, args.backend, stats)
+        for game, _ in games:
+            if args.no_replay:
+                stats.games += 1
+                if game.malformed:
+                    stats.malformed += 1
+                else:
+                    stats.moves += len(game.moves)
+                stats.seconds = time.perf_counter() - start
+            if game.error and args.errors:
+                print(f"{path}:{game.line}: {game.error}")
+        print(f"{path}: {stats.report()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
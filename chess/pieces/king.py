@@ -31,39 +31,41 @@ class King(NonSlidingPiece):
 
         row = 7 if self.white else 0
 
-        corner_piece = self.board.get_piece((row, 7))
+        if self.location != (row, 4):  # Check if king is in starting position
+            return False
+
+        rook = self.board.get_piece((row, 7))
 
-        if corner_piece is None or corner_piece.symbol not in ('R', 'r'):
+        if rook is None or rook.symbol not in ('R', 'r') or rook.times_moved != 0:
             return False
 
-        rook = corner_piece
+        # Spaces between are empty, and the king does not start in, pass through or land in check
+        if not (self.board.is_empty((row, 5)) and self.board.is_empty((row, 6))):
+            return False
 
-        if self.location == (row, 4):  # Check if king is in starting position
-            # Makes sure rook hasn't moved, spaces between are empty, and no squares are under attack
-            if (rook.times_moved == 0 and self.board.is_empty((row, 5))
-                    and self.board.is_empty((row, 6))):
-                return True
-            else:
-                return False
+        return not self._any_attacked(row, (4, 5, 6))
 
     def can_castle_queenside(self):
         if self.times_moved > 0:
             return False
 
-        rank = 7 if self.white else 0
+        row = 7 if self.white else 0
+
+        if self.location != (row, 4):  # Check if king is in starting position
+            return False
+
+        rook = self.board.get_piece((row, 0))
 
-        corner_piece = self.board.get_piece((rank, 0))
+        if rook is None or rook.symbol not in ('R', 'r') or rook.times_moved != 0:
+            return False
 
-        if corner_piece is None or corner_piece.symbol not in ('R', 'r'):
+        # b-file only has to be empty; the king never crosses it
+        if not (self.board.is_empty((row, 3)) and self.board.is_empty((row, 2))
+                and self.board.is_empty((row, 1))):
             return False
 
-        rook = corner_piece
+        return not self._any_attacked(row, (4, 3, 2))
 
-        if self.white:
-            if self.location == (rank, 4):  # Check if king is in starting position
-                # Makes sure rook hasn't moved, spaces between are empty, and no squares are under attack
-                if (rook.times_moved == 0 and self.board.is_empty((rank, 3))
-                        and self.board.is_empty((rank, 2)) and self.board.is_empty((rank, 1))):
-                    return True
-                else:
-                    return False
+    def _any_attacked(self, row, cols):
+        by_white = not self.white
+        return any(self.board.is_square_attacked((row, col), by_white) for col in cols)
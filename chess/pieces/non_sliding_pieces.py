@@ -1,11 +1,13 @@
 
 from chess.pieces.base import Piece
 from chess.move import Move
+from chess.mailbox import INDEX, SQUARE, EMPTY, LOWERCASE, step
 
 
 class NonSlidingPiece(Piece):
     def __init__(self, board, starting_location, white, symbol, move_directions):
         self.move_directions = move_directions
+        self.mailbox_steps = [step(direction) for direction in move_directions]
         super().__init__(board, starting_location, white, symbol)
 
     def candidate_moves(self):
@@ -18,14 +20,17 @@ class NonSlidingPiece(Piece):
         return candidate_moves
 
     def pseudo_legal_moves(self):
-        candidate_moves = self.candidate_moves()
+        r0, c0 = self.location
+        mailbox = self.board.mailbox
+        start = INDEX[r0][c0]
         moves = []
-        for square in candidate_moves:
-            if self.board.in_bounds(square):
-                if self.board.is_empty(square):
-                    moves.append(Move(self.location, square, self.symbol))
-                else:
-                    if self.board.get_piece(square) in self.board.get_enemy_pieces(self.white):
-                        moves.append(Move(self.location, square, self.symbol, capture=True))
+
+        for offset in self.mailbox_steps:
+            i = start + offset
+            code = mailbox[i]
+            if code == EMPTY:
+                moves.append(Move(self.location, SQUARE[i], self.symbol))
+            elif code > EMPTY and (code < LOWERCASE) != self.white:
+                moves.append(Move(self.location, SQUARE[i], self.symbol, capture=True))
 
         return moves
@@ -1,6 +1,7 @@
 
 from chess.pieces.base import Piece
 from chess.move import Move
+from chess.mailbox import INDEX, SQUARE, EMPTY, LOWERCASE, step
 
 
 class Pawn(Piece):
@@ -18,33 +19,37 @@ class Pawn(Piece):
         moves = []
 
         row, col = self.location
+        mailbox = self.board.mailbox
+        start = INDEX[row][col]
 
         direction = -1 if self.white else 1
         start_row = 6 if self.white else 1
         symbol = self.symbol
         promotion_rank = 0 if self.white else 7
+        forward = step((direction, 0))
 
-        one_square_move = (row + direction, col)
+        one_square_move = start + forward
 
-        if self.board.in_bounds(one_square_move) and self.board.is_empty(one_square_move):
-            if one_square_move[0] == promotion_rank:
+        if mailbox[one_square_move] == EMPTY:
+            if row + direction == promotion_rank:
                 for promo in self.promotion_pieces:
-                    moves.append(Move(self.location, one_square_move, piece=symbol, promotion=promo))
+                    moves.append(Move(self.location, SQUARE[one_square_move], piece=symbol, promotion=promo))
             else:
-                moves.append(Move(self.location, one_square_move, piece=symbol))
+                moves.append(Move(self.location, SQUARE[one_square_move], piece=symbol))
 
             # 2 steps forward
-            two_square_move = (row + 2 * direction, col)
-            if row == start_row and self.board.in_bounds(two_square_move) and self.board.is_empty(two_square_move):
-                moves.append(Move(self.location, two_square_move, symbol, pawn_moved_two_squares=True))
+            two_square_move = one_square_move + forward
+            if row == start_row and mailbox[two_square_move] == EMPTY:
+                moves.append(Move(self.location, SQUARE[two_square_move], symbol, pawn_moved_two_squares=True))
 
         # diagonal captures
         for diagonal_dir in (-1, 1):
-            target_square = (row + direction, col + diagonal_dir)
-            if not self.board.in_bounds(target_square):
-                continue
-            piece_on_tgt_sqr = self.board.get_piece(target_square)
-            if piece_on_tgt_sqr and (piece_on_tgt_sqr.white != self.white):
+            target = one_square_move + diagonal_dir
+            code = mailbox[target]
+            if code < EMPTY:
+                continue  # off the board
+            target_square = SQUARE[target]
+            if code > EMPTY and (code < LOWERCASE) != self.white:
                 if target_square[0] == promotion_rank:
                     for promo in self.promotion_pieces:
                         moves.append(Move(self.location, target_square, symbol, capture=True,
@@ -53,8 +58,8 @@ class Pawn(Piece):
                     moves.append(Move(self.location, target_square, symbol, capture=True))
             else:
                 # en passant
-                if self.can_en_passant(target_square):
-                    en_passant_square = self.can_en_passant(target_square)
+                en_passant_square = self.can_en_passant(target_square)
+                if en_passant_square:
                     moves.append(Move(self.location, target_square, symbol,
                                       capture=True,
                                       en_passant=True,
@@ -63,16 +68,9 @@ class Pawn(Piece):
         return moves
 
     def can_en_passant(self, target_square):
-        if len(self.board.history) == 0:
+        # board.ep_square is set by make_move after a double push, and by from_fen
+        if self.board.ep_square != target_square:
             return None
 
-        last_move = self.board.history[-1]
-        if last_move.pawn_moved_two_squares:
-            enemy_pawn_row, enemy_pawn_col = last_move.destination
-            en_passant_row = enemy_pawn_row - 1 if self.white else enemy_pawn_row + 1
-            en_passant_col = enemy_pawn_col
-
-            if en_passant_row == target_square[0] and en_passant_col == target_square[1]:
-                return last_move.destination
-
-        return None
+        # the captured pawn stands beside us, on the en passant file
+        return self.location[0], target_square[1]
@@ -1,28 +1,30 @@
 from chess.pieces.base import Piece
 from chess.move import Move
+from chess.mailbox import INDEX, SQUARE, EMPTY, LOWERCASE, step
 
 
 class SlidingPiece(Piece):
     def __init__(self, board, starting_location, white, symbol, move_directions):
         self.move_directions = move_directions
+        self.mailbox_steps = [step(direction) for direction in move_directions]
         super().__init__(board, starting_location, white, symbol)
 
     def pseudo_legal_moves(self):
         r0, c0 = self.location
+        mailbox = self.board.mailbox
+        start = INDEX[r0][c0]
         moves = []
 
-        for dr, dc in self.move_directions:
-            r, c = r0 + dr, c0 + dc
-            while self.board.in_bounds((r, c)):
-                piece_on_square = self.board.get_piece((r, c))
-                if piece_on_square is None:
-                    moves.append(Move(self.location, (r, c), self.symbol))
-                else:
-                    if piece_on_square.white != self.white:
-                        moves.append(Move(self.location, (r, c), self.symbol, capture=True))
-                    break
+        for offset in self.mailbox_steps:
+            i = start + offset
+            code = mailbox[i]
+            while code == EMPTY:
+                moves.append(Move(self.location, SQUARE[i], self.symbol))
+                i += offset
+                code = mailbox[i]
 
-                r += dr
-                c += dc
+            # stopped on a piece or on the border sentinel (which is below EMPTY)
+            if code > EMPTY and (code < LOWERCASE) != self.white:
+                moves.append(Move(self.location, SQUARE[i], self.symbol, capture=True))
 
         return moves
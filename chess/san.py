@@ -1,6 +1,11 @@
 
 import re
 
+from chess.attacks import (KNIGHT_ATTACKS, KING_ATTACKS, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS,
+                           ORTHOGONAL_RAYS, DIAGONAL_RAYS)
+from chess.move import Move, decode_move
+from chess.zobrist import CASTLE_K, CASTLE_Q, CASTLE_k, CASTLE_q
+
 FILES = "abcdefgh"
 
 def alg_to_rc(alg: str) -> tuple[int, int]:
@@ -17,7 +22,7 @@ def rc_to_alg(rc: tuple[int, int]) -> str:
 SAN = re.compile(r"""
 ^ \s*
 (?:
-    (?P<castle>O-O(?:-O)?|0-0(?:-0)?) |
+    (?P<castle>O-O(?:-O)?|0-0(?:-0)?) (?P<castle_check>[+#])? |
     (?P<piece>[KQRBN])?
     (?P<disamb>[a-h][1-8]|[a-h]|[1-8])?
     (?P<capture>x)?
@@ -28,16 +33,24 @@ SAN = re.compile(r"""
 \s*$
 """, re.VERBOSE)
 
-def parse_san_to_move(board, san: str):
+def parse_san_to_move(board, san: str, reference=False):
+    """Return the legal Move that SAN names on board, or raise ValueError.
+
+    By default only the moves of the named piece type that reach the destination square are
+    generated and tested for legality (see resolve_san). reference=True filters the full
+    legal move list of board.status() instead; both give the same moves and the same errors.
+    """
     san = san.strip()
     m = SAN.match(san)
     if not m:
         raise ValueError(f"Not SAN: {san}")
+    if not reference:
+        return resolve_san(board, san, m)
 
     # Castling
     if m.group("castle"):
         ks = m.group("castle") in ("O-O", "0-0")
-        for mv in board.legal_moves():                  # list[Move]
+        for mv in board.status().legal_moves:           # tuple[Move]
             if (ks and mv.castle_ks) or ((not ks) and mv.castle_qs):
                 return mv
         raise ValueError("Castling move not legal here")
@@ -83,7 +96,7 @@ def parse_san_to_move(board, san: str):
         return f_ok and r_ok
 
     candidates = [
-        mv for mv in board.legal_moves()
+        mv for mv in board.status().legal_moves
         if mv.destination == dst
         and is_piece_type(mv)
         and matches_capture(mv)
@@ -95,4 +108,249 @@ def parse_san_to_move(board, san: str):
         return candidates[0]
     if len(candidates) == 0:
         raise ValueError(f"No legal move matches {san}")
-    raise ValueError(f"Ambiguous SAN {san}: {len(candidates)} candidates")
\ No newline at end of file
+    raise ValueError(f"Ambiguous SAN {san}: {len(candidates)} candidates")
+
+# --- targeted resolution --------------------------------------------------------------------
+#
+# Rather than generating every legal move and filtering by destination, look outward from the
+# destination square for pieces of the named type that could reach it (the same tables
+# Board.is_square_attacked walks), and only make/unmake those candidates to test for check.
+
+_CASTLES = {
+    # (white, kingside) -> (rights bit, row, squares that must be empty, squares the king crosses)
+    (True, True): (CASTLE_K, 7, (5, 6), (4, 5, 6)),
+    (True, False): (CASTLE_Q, 7, (3, 2, 1), (4, 3, 2)),
+    (False, True): (CASTLE_k, 0, (5, 6), (4, 5, 6)),
+    (False, False): (CASTLE_q, 0, (3, 2, 1), (4, 3, 2)),
+}
+
+
+def _castle(board, kingside: bool):
+    white = board.white_to_move
+    bit, row, empty, crossed = _CASTLES[(white, kingside)]
+    if not board.castling_mask & bit:
+        return None
+    if any(board.get_piece((row, col)) is not None for col in empty):
+        return None
+    if any(board.is_square_attacked((row, col), not white) for col in crossed):
+        return None
+    return Move((row, 4), (row, 6 if kingside else 2), 'K' if white else 'k',
+                castle_ks=kingside, castle_qs=not kingside)
+
+
+def _sources(board, letter: str, dst, white: bool):
+    # squares holding a piece of ours of type letter that could move to dst
+    row, col = dst
+    symbol = letter if white else letter.lower()
+    if letter == 'N':
+        squares = KNIGHT_ATTACKS[row][col]
+    elif letter == 'K':
+        squares = KING_ATTACKS[row][col]
+    else:
+        rays = []
+        if letter in 'RQ':
+            rays += ORTHOGONAL_RAYS[row][col]
+        if letter in 'BQ':
+            rays += DIAGONAL_RAYS[row][col]
+        squares = []
+        for ray in rays:
+            for square in ray:
+                if board.get_piece(square) is not None:
+                    squares.append(square)
+                    break
+    found = []
+    for square in squares:
+        piece = board.get_piece(square)
+        if piece is not None and piece.symbol == symbol:
+            found.append(square)
+    return found
+
+
+def _pawn_moves(board, dst, white: bool, wants_capture: bool, promotion):
+    row, col = dst
+    symbol = 'P' if white else 'p'
+    back = 1 if white else -1  # rows are counted from rank 8
+    moves = []
+    if wants_capture:
+        sources = (BLACK_PAWN_ATTACKS if white else WHITE_PAWN_ATTACKS)[row][col]
+        en_passant = board.get_piece(dst) is None
+        if en_passant and board.ep_square != dst:
+            return moves  # nothing to take
+        for square in sources:
+            piece = board.get_piece(square)
+            if piece is None or piece.symbol != symbol:
+                continue
+            if en_passant:
+                moves.append(Move(square, dst, symbol, capture=True, en_passant=True,
+                                  captured_en_passant_square=(square[0], col)))
+            else:
+                moves.append(Move(square, dst, symbol, capture=True, promotion=promotion))
+        return moves
+
+    one = (row + back, col)
+    if not 0 <= one[0] < 8:
+        return moves
+    piece = board.get_piece(one)
+    if piece is not None:
+        if piece.symbol == symbol:
+            moves.append(Move(one, dst, symbol, promotion=promotion))
+    elif row == (4 if white else 3):
+        two = (row + 2 * back, col)
+        piece = board.get_piece(two)
+        if piece is not None and piece.symbol == symbol:
+            moves.append(Move(two, dst, symbol, pawn_moved_two_squares=True))
+    return moves
+
+
+def _is_legal(board, move) -> bool:
+    # make_move drops the cached status; unmake_move brings back the same position, so keep it
+    white = board.white_to_move
+    status = board._status
+    board.make_move(move)
+    try:
+        return not board.check(white)
+    finally:
+        board.unmake_move()
+        board._status = status
+
+
+def resolve_san(board, san: str, m=None):
+    """parse_san_to_move without generating the full legal move list."""
+    if m is None:
+        san = san.strip()
+        m = SAN.match(san)
+        if not m:
+            raise ValueError(f"Not SAN: {san}")
+
+    if m.group("castle"):
+        move = _castle(board, m.group("castle") in ("O-O", "0-0"))
+        if move is None:
+            raise ValueError("Castling move not legal here")
+        return move
+
+    white = board.white_to_move
+    letter = m.group("piece") or 'P'
+    disamb = m.group("disamb") or ""
+    wants_capture = m.group("capture") is not None
+    dst = alg_to_rc(m.group("dst"))
+    promo_letter = m.group("promo")
+
+    # the destination decides capture and promotion up front, as the full filter would
+    target = board.get_piece(dst)
+    candidates = []
+    if target is not None and target.white == white:
+        pass  # own piece on the destination
+    elif letter == 'P':
+        promotion_row = 0 if white else 7
+        if (dst[0] == promotion_row) == (promo_letter is not None):
+            if target is None or wants_capture:
+                promotion = promo_letter if promo_letter is None or white else promo_letter.lower()
+                candidates = _pawn_moves(board, dst, white, wants_capture, promotion)
+    elif promo_letter is None and (target is not None) == wants_capture:
+        symbol = letter if white else letter.lower()
+        candidates = [Move(square, dst, symbol, capture=wants_capture)
+                      for square in _sources(board, letter, dst, white)]
+        home = 7 if white else 0
+        if letter == 'K' and not wants_capture and dst in ((home, 6), (home, 2)):
+            # castling written as the king's move (Kg1, Kc8), which the full move list also matches
+            castle = _castle(board, dst[1] == 6)
+            if castle is not None:
+                candidates.append(castle)
+
+    if disamb:
+        if len(disamb) == 2:
+            candidates = [mv for mv in candidates if mv.source == alg_to_rc(disamb)]
+        elif disamb.isalpha():
+            candidates = [mv for mv in candidates if mv.source[1] == FILES.index(disamb)]
+        else:
+            candidates = [mv for mv in candidates if mv.source[0] == 8 - int(disamb)]
+
+    candidates = [mv for mv in candidates if _is_legal(board, mv)]
+
+    if len(candidates) == 1:
+        return candidates[0]
+    if len(candidates) == 0:
+        raise ValueError(f"No legal move matches {san}")
+    raise ValueError(f"Ambiguous SAN {san}: {len(candidates)} candidates")
+
+
+# --- SAN generation -------------------------------------------------------------------------
+
+
+def _find(move, legal_moves):
+    # the entry of legal_moves that is move (any Move-like object or a packed int)
+    if type(move) is int:
+        move = decode_move(move)
+    promotion = (move.promotion or "").upper()
+    for mv in legal_moves:
+        if (mv.source == move.source and mv.destination == move.destination
+                and (mv.promotion or "").upper() == promotion):
+            return mv
+    raise ValueError(f"Illegal move {rc_to_alg(move.source)}{rc_to_alg(move.destination)}")
+
+
+def _san_body(move, legal_moves) -> str:
+    # SAN without the check suffix; legal_moves disambiguates
+    if move.castle_ks:
+        return "O-O"
+    if move.castle_qs:
+        return "O-O-O"
+    dst = rc_to_alg(move.destination)
+    letter = move.piece.upper()
+    if letter == 'P':
+        san = f"{FILES[move.source[1]]}x{dst}" if move.capture else dst
+        if move.promotion:
+            san += "=" + move.promotion.upper()
+        return san
+
+    disamb = ""
+    rivals = [mv.source for mv in legal_moves
+              if mv.piece == move.piece and mv.destination == move.destination and mv.source != move.source]
+    if rivals:
+        row, col = move.source
+        if all(c != col for _, c in rivals):
+            disamb = FILES[col]
+        elif all(r != row for r, _ in rivals):
+            disamb = str(8 - row)
+        else:
+            disamb = rc_to_alg(move.source)
+    return f"{letter}{disamb}{'x' if move.capture else ''}{dst}"
+
+
+def move_to_san(board, move, legal_moves=None) -> str:
+    """SAN for a legal move on board, with '+' or '#'.
+
+    Pass the position's legal_moves if you already have them; the only other generation is
+    for the reply position, and only when the move gives check.
+    """
+    if legal_moves is None:
+        legal_moves = board.status().legal_moves
+    move = _find(move, legal_moves)
+    san = _san_body(move, legal_moves)
+
+    status = board._status  # as in _is_legal
+    board.make_move(move)
+    try:
+        if board.check(board.white_to_move):
+            san += "#" if not board.legal_moves() else "+"
+    finally:
+        board.unmake_move()
+        board._status = status
+    return san
+
+
+def moves_to_san(board, moves):
+    """Play moves on board, yielding the SAN of each.
+
+    Each position's legal moves are generated once and serve both the check/mate suffix of the
+    move into it and the disambiguation of the move out of it.
+    """
+    legal_moves = board.legal_moves()
+    for move in moves:
+        move = _find(move, legal_moves)
+        san = _san_body(move, legal_moves)
+        board.make_move(move)
+        legal_moves = board.legal_moves()
+        if board.check(board.white_to_move):
+            san += "#" if not legal_moves else "+"
+        yield san
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from chess.move import Move, decode_move, TACTICAL, CAPTURE
+from chess.movepick import MoveOrdering, staged_moves, mvv_lva, MAX_PLY
+from chess.see import losing_capture
+from chess.transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Negamax alpha-beta with iterative deepening over Board.make_move / unmake_move /
+# packed_legal_moves. The search is anytime: when a node or time limit (or stop()) interrupts a
+# depth, the result of the last completed depth is returned.
+#
+# At depth 0 a quiescence search takes over and plays out captures and promotions only, so the
+# static evaluation is never taken in the middle of an exchange. Captures that lose material by
+# static exchange evaluation (chess.see) are skipped there. Node counts are kept apart: nodes for
+# the main search, qnodes for quiescence; limits and nps use their sum.
+#
+# With a chess.tablebase.Tablebase, positions it covers are scored from the table below the root
+# (a win as a mate score at its exact distance) instead of being searched.
+
+MATE = 100000
+INFINITY = MATE + 1
+MAX_DEPTH = 64
+# scores this close to MATE are mates: the search's own plies, plus the longest distance to mate a
+# tablebase value can carry (chess.tablebase stores up to 127 moves, 254 plies)
+MATE_BAND = MAX_DEPTH + 256
+
+# how many nodes between checks of the clock and the stop flag
+CHECK_EVERY = 1024
+
+
+def is_mate_score(score: int) -> bool:
+    return abs(score) >= MATE - MATE_BAND
+
+
+@dataclass
+class DepthInfo:
+    depth: int
+    score: int
+    nodes: int  # main search and quiescence together
+    seconds: float
+    nps: int
+    pv: list[Move]
+    qnodes: int = 0
+
+
+@dataclass
+class SearchResult:
+    best_move: Move | None
+    score: int
+    depth: int  # last completed depth
+    pv: list[Move]
+    nodes: int  # main search and quiescence together
+    seconds: float
+    qnodes: int = 0
+    iterations: list[DepthInfo] = field(default_factory=list)
+
+
+class SearchAborted(Exception):
+    pass
+
+
+def score_to_tt(score: int, ply: int) -> int:
+    # mate scores are stored relative to the node, not the root, so they stay valid on transposition
+    if score >= MATE - MATE_BAND:
+        return score + ply
+    if score <= -MATE + MATE_BAND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE - MATE_BAND:
+        return score - ply
+    if score <= -MATE + MATE_BAND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    def __init__(self, board, on_depth=None, tt: TranspositionTable | None = None, tablebase=None):
+        self.board = board
+        self.tablebase = tablebase
+        self.on_depth = on_depth  # called with a DepthInfo after each completed depth
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.ordering = MoveOrdering()
+        self.nodes = 0  # main search nodes
+        self.qnodes = 0  # quiescence nodes
+        self.tbhits = 0
+        self.stopped = False
+        self._deadline = None
+        self._node_limit = float("inf")
+
+    def stop(self):
+        # safe to call from another thread; the search notices within CHECK_EVERY nodes
+        self.stopped = True
+
+    def search(self, depth: int | None = None, nodes: int | None = None,
+               movetime: float | None = None) -> SearchResult:
+        """Search the current position.
+
+        depth limits the iterative deepening, nodes the total node count and movetime the wall
+        time in seconds. With no limits at all the search runs until stop() or MAX_DEPTH.
+        """
+        board = self.board
+        self.nodes = self.qnodes = self.tbhits = 0
+        self.stopped = False
+        self._node_limit = nodes if nodes is not None else float("inf")
+        start = time.perf_counter()
+        self._deadline = start + movetime if movetime is not None else None
+        max_depth = min(depth or MAX_DEPTH, MAX_DEPTH)
+        self.tt.new_search()
+        self.ordering.new_search()
+
+        root_moves = board.packed_legal_moves()
+        result = SearchResult(decode_move(root_moves[0]) if root_moves else None,
+                              0, 0, [], 0, 0.0)
+        pv = []
+        if root_moves:
+            for d in range(1, max_depth + 1):
+                try:
+                    score, line = self._root(d, pv[0] if pv else 0)
+                except SearchAborted:
+                    break
+                pv = line
+                seconds = time.perf_counter() - start
+                total = self.total_nodes
+                info = DepthInfo(d, score, total, seconds,
+                                 int(total / seconds) if seconds > 0 else 0,
+                                 [decode_move(m) for m in pv], self.qnodes)
+                result.iterations.append(info)
+                result.best_move = info.pv[0]
+                result.score = score
+                result.depth = d
+                result.pv = info.pv
+                if self.on_depth:
+                    self.on_depth(info)
+                if is_mate_score(score) or self.stopped:
+                    break
+
+        result.nodes = self.total_nodes
+        result.qnodes = self.qnodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _root(self, depth, first):
+        board = self.board
+        alpha, beta = -INFINITY, INFINITY
+        best_line = []
+        for move in staged_moves(board, self.ordering, 0, first):
+            board.make_move(move)
+            try:
+                score, line = self._negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake_move()
+            score = -score
+            if score > alpha or not best_line:
+                alpha = score
+                best_line = [move] + line
+        self.tt.store(board.zobrist_key, depth, EXACT, score_to_tt(alpha, 0), best_line[0])
+        return alpha, best_line
+
+    @property
+    def total_nodes(self) -> int:
+        return self.nodes + self.qnodes
+
+    def _negamax(self, depth, alpha, beta, ply):
+        board = self.board
+        if board.check_threefold_repetition() or board.check_fifty_move_rule():
+            return 0, []
+
+        if self.tablebase is not None:
+            result = self.tablebase.probe(board)
+            if result is not None:
+                self.tbhits += 1
+                if result.wdl > 0:
+                    return MATE - ply - result.dtm, []
+                if result.wdl < 0:
+                    return -MATE + ply + result.dtm, []
+                return 0, []
+
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply)
+
+        self.nodes += 1
+        total = self.nodes + self.qnodes
+        if total >= self._node_limit or total % CHECK_EVERY == 0:
+            self._check_limits()
+
+        key = board.zobrist_key
+        entry = self.tt.probe(key)
+        hash_move = 0
+        if entry is not None:
+            tt_depth, bound, tt_score, hash_move = entry
+            if tt_depth >= depth:
+                tt_score = score_from_tt(tt_score, ply)
+                if (bound == EXACT
+                        or (bound == LOWER and tt_score >= beta)
+                        or (bound == UPPER and tt_score <= alpha)):
+                    return tt_score, [hash_move] if hash_move else []
+
+        original_alpha = alpha
+        best_line = []
+        best_move = 0
+        searched = 0
+        for move in staged_moves(board, self.ordering, ply, hash_move):
+            searched += 1
+            board.make_move(move)
+            try:
+                score, line = self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            score = -score
+            if score >= beta:
+                if not move & TACTICAL:
+                    self.ordering.cutoff(move, depth, ply)
+                self.tt.store(key, depth, LOWER, score_to_tt(beta, ply), move)
+                return beta, []
+            if score > alpha:
+                alpha = score
+                best_line = [move] + line
+                best_move = move
+
+        if not searched:
+            if board.check(board.white_to_move):
+                return -MATE + ply, []
+            return 0, []
+
+        bound = EXACT if alpha > original_alpha else UPPER
+        self.tt.store(key, depth, bound, score_to_tt(alpha, ply), best_move)
+        return alpha, best_line
+
+    def _quiesce(self, alpha, beta, ply):
+        board = self.board
+        self.qnodes += 1
+        total = self.nodes + self.qnodes
+        if total >= self._node_limit or total % CHECK_EVERY == 0:
+            self._check_limits()
+
+        # in check there is no standing pat: every evasion is searched, and none means mate
+        in_check = board.check(board.white_to_move)
+        if in_check and ply < MAX_PLY:
+            moves = board.packed_legal_moves()
+            if not moves:
+                return -MATE + ply, []
+        else:
+            stand_pat = board.evaluate()
+            if stand_pat >= beta or ply >= MAX_PLY:
+                return min(stand_pat, beta), []
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = board.packed_legal_moves(captures=True)
+            moves.sort(key=lambda move: mvv_lva(board, move), reverse=True)
+
+        best_line = []
+        for move in moves:
+            if not in_check and move & CAPTURE and losing_capture(board, move):
+                continue
+            board.make_move(move)
+            try:
+                score, line = self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            score = -score
+            if score >= beta:
+                return beta, []
+            if score > alpha:
+                alpha = score
+                best_line = [move] + line
+        return alpha, best_line
+
+    def _check_limits(self):
+        if self.stopped:
+            raise SearchAborted
+        if self.total_nodes >= self._node_limit:
+            self.stopped = True
+            raise SearchAborted
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            self.stopped = True
+            raise SearchAborted
+
+
+def search(board, depth=None, nodes=None, movetime=None, on_depth=None, tt=None, tablebase=None) -> SearchResult:
+    return Searcher(board, on_depth, tt, tablebase).search(depth, nodes, movetime)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from chess.move import Move
+
+# The state of a position as a game sees it: its legal moves, whether the side to move is in
+# check, and whether (and how) the game is over. Board.status() computes this once per position
+# and keeps it until the next make_move or unmake_move, so a UI or server that asks again and
+# again, or a SAN parser that wants the move list after the game loop has looked for mate, pays
+# for move generation once.
+#
+# The fifty-move rule and threefold repetition are, strictly, draws a player may claim; like
+# game.main, the status treats them as ending the game. Checkmate takes precedence over both.
+
+WHITE_WINS = "1-0"
+BLACK_WINS = "0-1"
+DRAW = "1/2-1/2"
+
+# how the game ended
+CHECKMATE = "checkmate"
+STALEMATE = "stalemate"
+INSUFFICIENT_MATERIAL = "insufficient material"
+FIFTY_MOVES = "fifty-move rule"
+THREEFOLD_REPETITION = "threefold repetition"
+
+
+@dataclass(frozen=True)
+class GameStatus:
+    legal_moves: tuple[Move, ...]
+    in_check: bool
+    result: str | None = None  # WHITE_WINS, BLACK_WINS or DRAW once the game is over
+    reason: str | None = None  # CHECKMATE, STALEMATE or the first of draw_reasons
+    draw_reasons: tuple[str, ...] = ()  # every draw rule that applies, stalemate aside
+
+    @property
+    def checkmate(self) -> bool:
+        return self.reason == CHECKMATE
+
+    @property
+    def stalemate(self) -> bool:
+        return self.reason == STALEMATE
+
+    @property
+    def is_over(self) -> bool:
+        return self.result is not None
+
+
+def compute_status(board) -> GameStatus:
+    # Board.status() / BitboardBoard.status() when nothing is cached
+    legal_moves = tuple(board.legal_moves())
+    in_check = board.check(board.white_to_move)
+
+    draw_reasons = []
+    if board.check_insufficient_material():
+        draw_reasons.append(INSUFFICIENT_MATERIAL)
+    if board.check_fifty_move_rule():
+        draw_reasons.append(FIFTY_MOVES)
+    if board.check_threefold_repetition():
+        draw_reasons.append(THREEFOLD_REPETITION)
+    draw_reasons = tuple(draw_reasons)
+
+    if not legal_moves:
+        if in_check:
+            return GameStatus(legal_moves, in_check, BLACK_WINS if board.white_to_move else WHITE_WINS,
+                              CHECKMATE, draw_reasons)
+        return GameStatus(legal_moves, in_check, DRAW, STALEMATE, draw_reasons)
+    if draw_reasons:
+        return GameStatus(legal_moves, in_check, DRAW, draw_reasons[0], draw_reasons)
+    return GameStatus(legal_moves, in_check)
@@ -0,0 +1,742 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from chess.attacks import KING_ATTACKS, KNIGHT_ATTACKS, WHITE_PAWN_ATTACKS, ORTHOGONAL_RAYS, DIAGONAL_RAYS
+from chess.fen import from_fen, to_fen
+
+# Endgame tablebases for a lone king against small piece sets: python -m chess.tablebase build|probe
+# (python -m chess.tablebase --self-check builds KQK, KRK and KPK in a temporary directory and checks them)
+#
+# Each table stores, for every placement of its pieces with either side to move, one byte of
+# win/draw/loss and distance to mate, found by retrograde analysis:
+#   - every position is classified once (illegal, checkmate, stalemate, or how many distinct
+#     positions the lone king can move to, a legal capture making it a draw for good);
+#   - from the mates outward, one ply at a time, a position with the strong side to move is won
+#     as soon as one move reaches a lost position, and a position with the lone king to move is
+#     lost once every one of its moves has been found to reach a won one.
+# Promotions in KPK look up KQK and KRK, so those are built first.
+#
+# Index: the strong side is always white. The white king is reduced by symmetry first: to the
+# ten squares of the a1-d1-d4 triangle for pawnless tables (all eight reflections of the board),
+# to files a-d when there are pawns (left-right only). The black king and each white piece
+# follow with 64 squares each (48 for pawns, ranks 2-7). With the white king on the a1-d4
+# diagonal a position has two such indices; only the smaller is used, the other is stored as
+# illegal. Positions where black has the pieces are probed with the colours swapped.
+#
+# On disk a table is a HEADER_SIZE header followed by the white-to-move and black-to-move byte
+# arrays; Tablebase maps the files and reads single bytes, so opening costs nothing.
+#
+# Value byte, from the side to move's point of view:
+#   0          draw
+#   1 .. 127   win, mate in that many moves (2n - 1 plies)
+#   128 .. 254 loss, mated in (value - 128) moves (2n plies; 128 is checkmate on the board)
+#   255        illegal position, or the duplicate index of a diagonal-symmetric one
+
+TABLES = {"KQK": "Q", "KRK": "R", "KPK": "P", "KBNK": "BN"}  # table -> white pieces besides the king
+DEPENDS = {"KPK": ("KQK", "KRK")}  # promotions
+DRAWN = {"", "B", "N"}  # KK, KBK, KNK: no table needed
+
+DRAW = 0
+LOSS = 128
+ILLEGAL = 255
+_ESCAPE = 255  # black move counter for a position where the king can take a piece
+
+HEADER_SIZE = 32
+MAGIC = b"CHESSTB\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sH8sxxQ4x")  # magic, version, table name, positions per side
+
+INIT_CHUNK = 1 << 15
+RETRO_CHUNK = 1 << 12
+
+# longest mate in moves with white to move, for `python -m chess.tablebase --self-check`
+LONGEST_MATE = {"KQK": 10, "KRK": 16, "KPK": 28, "KBNK": 33}
+SELF_CHECK_TABLES = ("KQK", "KRK", "KPK")  # KBNK takes about a minute to build
+SELF_CHECK_SAMPLES = 300  # random positions probed per table
+
+
+def win_value(plies: int) -> int:
+    return (plies + 1) // 2
+
+
+def loss_value(plies: int) -> int:
+    return LOSS + plies // 2
+
+
+def decode_value(value: int) -> tuple[int, int]:
+    # (wdl, plies to mate) for the side to move: wdl 1 win, 0 draw, -1 loss
+    if value == DRAW:
+        return 0, 0
+    if value < LOSS:
+        return 1, 2 * value - 1
+    return -1, 2 * (value - LOSS)
+
+
+# --- geometry on square indices (row * 8 + col, a8 = 0) ----------------------------------------
+
+
+def _index_lists(table):
+    return [[r * 8 + c for r, c in table[sq // 8][sq % 8]] for sq in range(64)]
+
+
+def _mask(squares) -> int:
+    bits = 0
+    for sq in squares:
+        bits |= 1 << sq
+    return bits
+
+
+KING_LIST = _index_lists(KING_ATTACKS)
+KNIGHT_LIST = _index_lists(KNIGHT_ATTACKS)
+KING_MASK = [_mask(squares) for squares in KING_LIST]
+KNIGHT_MASK = [_mask(squares) for squares in KNIGHT_LIST]
+PAWN_MASK = [_mask(squares) for squares in _index_lists(WHITE_PAWN_ATTACKS)]
+ORTHOGONAL = [[[r * 8 + c for r, c in ray] for ray in ORTHOGONAL_RAYS[sq // 8][sq % 8]] for sq in range(64)]
+DIAGONAL = [[[r * 8 + c for r, c in ray] for ray in DIAGONAL_RAYS[sq // 8][sq % 8]] for sq in range(64)]
+
+_ORTHOGONAL_LINE, _DIAGONAL_LINE = 1, 2
+LINE = [[0] * 64 for _ in range(64)]  # LINE[a][b]: 1 rank/file, 2 diagonal, 0 neither
+BETWEEN = [[0] * 64 for _ in range(64)]  # BETWEEN[a][b]: mask of the squares strictly between
+for _sq in range(64):
+    for _kind, _rays in ((_ORTHOGONAL_LINE, ORTHOGONAL[_sq]), (_DIAGONAL_LINE, DIAGONAL[_sq])):
+        for _ray in _rays:
+            _between = 0
+            for _to in _ray:
+                LINE[_sq][_to] = _kind
+                BETWEEN[_sq][_to] = _between
+                _between |= 1 << _to
+
+# the eight reflections of the board as square maps; bit 0 flips files, bit 1 flips ranks,
+# bit 2 swaps ranks and files (applied last)
+TRANSFORMS = []
+for _t in range(8):
+    _map = []
+    for _sq in range(64):
+        _row, _col = _sq // 8, _sq % 8
+        if _t & 1:
+            _col = 7 - _col
+        if _t & 2:
+            _row = 7 - _row
+        if _t & 4:
+            _row, _col = 7 - _col, 7 - _row
+        _map.append(_row * 8 + _col)
+    TRANSFORMS.append(_map)
+
+
+def _rank(sq: int) -> int:
+    return 7 - sq // 8
+
+
+def _file(sq: int) -> int:
+    return sq % 8
+
+
+TRIANGLE = [sq for sq in range(64) if _file(sq) <= 3 and _rank(sq) <= _file(sq)]  # a1-d1-d4
+LEFT_HALF = [sq for sq in range(64) if _file(sq) <= 3]
+
+
+def _pawnless_transforms(sq: int) -> list[int]:
+    return [t for t in range(8) if TRANSFORMS[t][sq] in TRIANGLE]
+
+
+def _pawn_transforms(sq: int) -> list[int]:
+    return [0] if _file(sq) <= 3 else [1]
+
+
+def _attacked(target: int, wk: int, pieces, occ: int) -> bool:
+    # is target attacked by the white king or one of pieces ((kind, square) pairs) given occupancy occ
+    if KING_MASK[wk] >> target & 1:
+        return True
+    for kind, sq in pieces:
+        if kind == 'N':
+            if KNIGHT_MASK[sq] >> target & 1:
+                return True
+        elif kind == 'P':
+            if PAWN_MASK[sq] >> target & 1:
+                return True
+        else:
+            line = LINE[sq][target]
+            if line and (kind == 'Q' or (kind == 'R') == (line == _ORTHOGONAL_LINE)) \
+                    and not BETWEEN[sq][target] & occ:
+                return True
+    return False
+
+
+class _Layout:
+    """Index arithmetic for one table: white king slot, black king, then each white piece."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.kinds = TABLES[name]
+        pawns = 'P' in self.kinds
+        self.king_squares = LEFT_HALF if pawns else TRIANGLE
+        self.king_slot = {sq: i for i, sq in enumerate(self.king_squares)}
+        self.king_transforms = [(_pawn_transforms if pawns else _pawnless_transforms)(sq) for sq in range(64)]
+        self.sizes = [48 if kind == 'P' else 64 for kind in self.kinds]
+        self.offsets = [8 if kind == 'P' else 0 for kind in self.kinds]
+        self.size = len(self.king_squares) * 64
+        for size in self.sizes:
+            self.size *= size
+
+    def index(self, wk: int, bk: int, squares) -> int:
+        # the smallest index over the reflections that bring the white king into the reduced set
+        best = -1
+        for t in self.king_transforms[wk]:
+            T = TRANSFORMS[t]
+            index = self.king_slot[T[wk]] * 64 + T[bk]
+            for size, offset, sq in zip(self.sizes, self.offsets, squares):
+                index = index * size + T[sq] - offset
+            if best < 0 or index < best:
+                best = index
+        return best
+
+    def decode(self, index: int) -> tuple[int, int, list[int]]:
+        squares = []
+        for size, offset in zip(reversed(self.sizes), reversed(self.offsets)):
+            index, sq = divmod(index, size)
+            squares.append(sq + offset)
+        squares.reverse()
+        index, bk = divmod(index, 64)
+        return self.king_squares[index], bk, squares
+
+
+_layouts = {}
+
+
+def _layout(name: str) -> _Layout:
+    if name not in _layouts:
+        _layouts[name] = _Layout(name)
+    return _layouts[name]
+
+
+# --- generation --------------------------------------------------------------------------------
+
+
+def _black_moves(layout, wk, bk, squares, pieces, occ):
+    # indices of the distinct positions the black king can move to, or None if it can take a piece
+    occ &= ~(1 << bk)
+    children = set()
+    for to in KING_LIST[bk]:
+        if KING_MASK[wk] >> to & 1:
+            continue
+        if occ >> to & 1:
+            rest = [piece for piece in pieces if piece[1] != to]
+            if not _attacked(to, wk, rest, occ):
+                return None
+        elif not _attacked(to, wk, pieces, occ):
+            children.add(layout.index(wk, to, squares))
+    return children
+
+
+def _init_chunk(name: str, start: int, stop: int, directory: str):
+    """Classify positions start:stop.
+
+    Returns the white-to-move and black-to-move value bytes, the black move counters, the
+    black-to-move checkmates, and (index, plies) wins for white by promotion.
+    """
+    layout = _layout(name)
+    kinds = layout.kinds
+    n = stop - start
+    wtm = bytearray(n)
+    btm = bytearray(n)
+    counters = bytearray(n)
+    mates = []
+    seeds = []
+    for i in range(n):
+        index = start + i
+        wk, bk, squares = layout.decode(index)
+        occ = 1 << wk | 1 << bk
+        for sq in squares:
+            occ |= 1 << sq
+        if (occ.bit_count() != 2 + len(squares) or KING_MASK[wk] >> bk & 1
+                or layout.index(wk, bk, squares) != index):
+            wtm[i] = btm[i] = ILLEGAL
+            continue
+        pieces = list(zip(kinds, squares))
+
+        # black to move
+        children = _black_moves(layout, wk, bk, squares, pieces, occ)
+        if children is None:
+            counters[i] = _ESCAPE
+        elif children:
+            counters[i] = len(children)
+        elif _attacked(bk, wk, pieces, occ):
+            btm[i] = loss_value(0)
+            mates.append(index)
+
+        # white to move: illegal with black in check
+        if _attacked(bk, wk, pieces, occ):
+            wtm[i] = ILLEGAL
+            continue
+        for j, (kind, sq) in enumerate(pieces):
+            if kind == 'P' and sq < 16 and not occ >> (sq - 8) & 1:
+                best = _promotion_plies(directory, wk, bk, pieces, j, sq - 8)
+                if best is not None:
+                    seeds.append((index, best))
+    return bytes(wtm), bytes(btm), bytes(counters), mates, seeds
+
+
+def _promotion_plies(directory, wk, bk, pieces, j, to):
+    # fewest plies to mate over the promotions of pieces[j] on to, or None if none of them wins
+    best = None
+    for kind in "QR":
+        promoted = [(kind, to) if k == j else piece for k, piece in enumerate(pieces)]
+        value = _subtable(directory, kind).value(wk, bk, promoted, False)
+        if LOSS <= value < ILLEGAL:
+            plies = decode_value(value)[1] + 1
+            best = plies if best is None else min(best, plies)
+    return best
+
+
+_opened = {}
+
+
+def _subtable(directory, kinds):
+    # the table for white pieces kinds, opened once per process
+    key = (directory, kinds)
+    if key not in _opened:
+        name = _table_name(kinds)
+        _opened[key] = TableFile(os.path.join(directory, name + ".tb"))
+    return _opened[key]
+
+
+def _predecessor_chunk(name: str, indices, white_moved: bool):
+    # for each position, the distinct indices of the positions one move before it
+    layout = _layout(name)
+    kinds = layout.kinds
+    result = []
+    for index in indices:
+        wk, bk, squares = layout.decode(index)
+        occ = 1 << wk | 1 << bk
+        for sq in squares:
+            occ |= 1 << sq
+        before = set()
+        if not white_moved:
+            for frm in KING_LIST[bk]:
+                if not occ >> frm & 1 and not KING_MASK[wk] >> frm & 1:
+                    before.add(layout.index(wk, frm, squares))
+            result.append(before)
+            continue
+
+        for frm in KING_LIST[wk]:
+            if not occ >> frm & 1 and not KING_MASK[bk] >> frm & 1:
+                before.add(layout.index(frm, bk, squares))
+        for j, (kind, sq) in enumerate(zip(kinds, squares)):
+            if kind == 'N':
+                origins = [frm for frm in KNIGHT_LIST[sq] if not occ >> frm & 1]
+            elif kind == 'P':
+                origins = []
+                if sq < 48 and not occ >> (sq + 8) & 1:  # the pawn stands on rank 3-7
+                    origins.append(sq + 8)
+                    if sq // 8 == 4 and not occ >> (sq + 16) & 1:
+                        origins.append(sq + 16)
+            else:
+                rays = []
+                if kind in "RQ":
+                    rays += ORTHOGONAL[sq]
+                if kind in "BQ":
+                    rays += DIAGONAL[sq]
+                origins = []
+                for ray in rays:
+                    for frm in ray:
+                        if occ >> frm & 1:
+                            break
+                        origins.append(frm)
+            for frm in origins:
+                moved = list(squares)
+                moved[j] = frm
+                before.add(layout.index(wk, bk, moved))
+        result.append(before)
+    return result
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def generate(name: str, directory: str, pool=None) -> dict:
+    """Build table name into directory/name.tb; pool (a ProcessPoolExecutor) spreads the work."""
+    layout = _layout(name)
+    size = layout.size
+    start_time = time.perf_counter()
+    run = pool.map if pool is not None else map
+
+    wtm = bytearray(size)
+    btm = bytearray(size)
+    counters = bytearray(size)
+    btm_frontier = []
+    seeds = {}
+    starts = list(range(0, size, INIT_CHUNK))
+    stops = [min(s + INIT_CHUNK, size) for s in starts]
+    for s, e, (w, b, c, mates, wins) in zip(starts, stops, run(_init_chunk, [name] * len(starts), starts,
+                                                                 stops, [directory] * len(starts))):
+        wtm[s:e], btm[s:e], counters[s:e] = w, b, c
+        btm_frontier += mates
+        for index, plies in wins:
+            seeds.setdefault(plies, []).append(index)
+
+    def predecessors(frontier, white_moved):
+        chunks = _chunks(frontier, RETRO_CHUNK)
+        for sets in run(_predecessor_chunk, [name] * len(chunks), chunks, [white_moved] * len(chunks)):
+            yield from sets
+
+    plies = 0  # btm_frontier holds the positions lost in this many plies
+    while btm_frontier or any(p > plies for p in seeds):
+        won = []
+        value = win_value(plies + 1)
+        for before in predecessors(btm_frontier, True):
+            for index in before:
+                if wtm[index] == DRAW:
+                    wtm[index] = value
+                    won.append(index)
+        for index in seeds.pop(plies + 1, []):
+            if wtm[index] == DRAW:
+                wtm[index] = value
+                won.append(index)
+
+        lost = []
+        value = loss_value(plies + 2)
+        for before in predecessors(won, False):
+            for index in before:
+                if btm[index] == DRAW and counters[index] != _ESCAPE:
+                    counters[index] -= 1
+                    if not counters[index]:
+                        btm[index] = value
+                        lost.append(index)
+        btm_frontier = lost
+        plies += 2
+
+    path = os.path.join(directory, name + ".tb")
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, name.encode(), size))
+        f.write(wtm)
+        f.write(btm)
+
+    legal = size - wtm.count(ILLEGAL)
+    return {"table": name, "positions": 2 * size, "white_wins": legal - wtm.count(DRAW),
+            "white_to_move": legal, "longest_mate": max((v for v in wtm if v < LOSS), default=0),
+            "seconds": round(time.perf_counter() - start_time, 2)}
+
+
+def build(directory: str, names=None, workers: int | None = None, out=None) -> list[dict]:
+    """Build the named tables (default all) and the tables they depend on, in dependency order."""
+    names = list(names or TABLES)
+    order = []
+    for name in names:
+        for needed in DEPENDS.get(name, ()) + (name,):
+            if needed not in order:
+                order.append(needed)
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    reports = []
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for name in order:
+            report = generate(name, directory, pool)
+            reports.append(report)
+            if out is not None:
+                out.write(f"{name}: {report['white_wins']} of {report['white_to_move']} white-to-move "
+                          f"positions won, longest mate {report['longest_mate']} moves, {report['seconds']}s\n")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return reports
+
+
+# --- probing -----------------------------------------------------------------------------------
+
+
+def _table_name(kinds: str) -> str:
+    return "K" + kinds + "K"
+
+
+class TableFile:
+    """One table file, mapped read-only."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, name, size = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a tablebase file of version {VERSION}")
+        self.name = name.rstrip(b"\0").decode()
+        if self.name not in TABLES or _layout(self.name).size != size:
+            raise ValueError(f"{path}: unknown table {self.name}")
+        if len(self._mm) != HEADER_SIZE + 2 * size:
+            raise ValueError(f"{path}: truncated")
+        self.layout = _layout(self.name)
+
+    def value(self, wk: int, bk: int, pieces, white_to_move: bool) -> int:
+        # pieces: (kind, square) pairs in the table's order, white the strong side
+        index = self.layout.index(wk, bk, [sq for _, sq in pieces])
+        return self._mm[HEADER_SIZE + (0 if white_to_move else self.layout.size) + index]
+
+    def close(self):
+        self._mm.close()
+
+
+@dataclass
+class TablebaseResult:
+    wdl: int  # 1 win, 0 draw, -1 loss, for the side to move
+    dtm: int  # plies to mate with best play (0 for a draw)
+
+
+def _piece_count(board) -> int:
+    occ = getattr(board, "occ", None)
+    if occ is not None:
+        return (occ[0] | occ[1]).bit_count()
+    return len(board.white_objects) + len(board.black_objects)
+
+
+class Tablebase:
+    """The tables found in a directory, probed through mmap."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables = {}
+        for name, kinds in TABLES.items():
+            path = os.path.join(directory, name + ".tb")
+            if os.path.exists(path):
+                self.tables["".join(sorted(kinds))] = TableFile(path)
+        self.max_pieces = max((2 + len(kinds) for kinds in self.tables), default=3)
+
+    def probe(self, board) -> TablebaseResult | None:
+        """The position's value, or None if no table covers it."""
+        if _piece_count(board) > self.max_pieces:
+            return None
+        white, black = [], []
+        wk = bk = None
+        for sq in range(64):
+            piece = board.get_piece((sq // 8, sq % 8))
+            if piece is None:
+                continue
+            if piece.symbol == 'K':
+                wk = sq
+            elif piece.symbol == 'k':
+                bk = sq
+            else:
+                (white if piece.white else black).append((piece.symbol.upper(), sq))
+        white_to_move = board.white_to_move
+        if white and black:
+            return None
+        if black:  # swap colours: mirror the ranks
+            wk, bk = bk ^ 56, wk ^ 56
+            white = [(kind, sq ^ 56) for kind, sq in black]
+            white_to_move = not white_to_move
+
+        kinds = "".join(sorted(kind for kind, _ in white))
+        if kinds in DRAWN:
+            return TablebaseResult(0, 0)
+        table = self.tables.get(kinds)
+        if table is None:
+            return None
+        order = table.layout.kinds
+        pieces = sorted(white, key=lambda piece: order.index(piece[0]))
+        value = table.value(wk, bk, pieces, white_to_move)
+        if value == ILLEGAL:
+            return None
+        return TablebaseResult(*decode_value(value))
+
+    def best_move(self, board):
+        """The legal move that keeps the best value (fastest mate, slowest loss), or None."""
+        if self.probe(board) is None:
+            return None
+        best, best_key = None, None
+        for move in board.legal_moves():
+            board.make_move(move)
+            try:
+                result = self.probe(board)
+            finally:
+                board.unmake_move()
+            if result is None:
+                continue
+            # the reply's value is the opponent's: their loss is our win
+            if result.wdl < 0:
+                key = (2, -result.dtm)
+            elif result.wdl == 0:
+                key = (1, 0)
+            else:
+                key = (0, result.dtm)
+            if best_key is None or key > best_key:
+                best, best_key = move, key
+        return best
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+
+
+# --- self-check --------------------------------------------------------------------------------
+
+
+def _fen(placed: dict[int, str], white_to_move: bool) -> str:
+    ranks = []
+    for row in range(8):
+        rank, empty = "", 0
+        for col in range(8):
+            symbol = placed.get(row * 8 + col)
+            if symbol is None:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            rank += symbol
+        ranks.append(rank + (str(empty) if empty else ""))
+    return "/".join(ranks) + (" w" if white_to_move else " b") + " - - 0 1"
+
+
+def _expected(tablebase, board) -> tuple[int, int] | None:
+    # (wdl, plies) for the side to move from the tables' values one move on, None if one is missing
+    moves = board.legal_moves()
+    if not moves:
+        return (-1, 0) if board.check(board.white_to_move) else (0, 0)
+    best, best_key = None, None
+    for move in moves:
+        board.make_move(move)
+        try:
+            result = tablebase.probe(board)
+        finally:
+            board.unmake_move()
+        if result is None:
+            return None
+        value = (-result.wdl, result.dtm + 1 if result.wdl else 0)
+        key = (value[0], -value[1] if value[0] > 0 else value[1])
+        if best_key is None or key > best_key:
+            best, best_key = value, key
+    return best
+
+
+def _check_probes(tablebase, name: str, samples: int, rnd) -> list[str]:
+    # random positions must probe the same in every reflection and with the colours swapped, and
+    # agree with the best of their moves
+    from chess.board import Board
+
+    problems = []
+    kinds = TABLES[name]
+    transforms = [0, 1] if 'P' in kinds else range(8)
+    checked = 0
+    while checked < samples and len(problems) < 10:
+        squares = rnd.sample(range(64), 2 + len(kinds))
+        wk, bk, pieces = squares[0], squares[1], list(zip(kinds, squares[2:]))
+        if KING_MASK[wk] >> bk & 1 or any(kind == 'P' and not 8 <= sq < 56 for kind, sq in pieces):
+            continue
+        white_to_move = rnd.random() < 0.5
+        placed = {wk: 'K', bk: 'k'}
+        placed.update((sq, kind) for kind, sq in pieces)
+        board = Board.from_fen(_fen(placed, white_to_move), "bitboard")
+        if board.check(not board.white_to_move):
+            continue
+        checked += 1
+        fen = to_fen(board)
+        result = tablebase.probe(board)
+        if result is None:
+            problems.append(f"{name}: {fen} not found")
+            continue
+        value = (result.wdl, result.dtm)
+        expected = _expected(tablebase, board)
+        if value != expected:
+            problems.append(f"{name}: {fen} probes {value}, its moves give {expected}")
+
+        variants = [{TRANSFORMS[t][sq]: symbol for sq, symbol in placed.items()} for t in transforms]
+        swapped = [({sq ^ 56: symbol.swapcase() for sq, symbol in variant.items()}, not white_to_move)
+                   for variant in variants]
+        for variant, side in [(variant, white_to_move) for variant in variants] + swapped:
+            other = tablebase.probe(Board.from_fen(_fen(variant, side), "bitboard"))
+            if other is None or (other.wdl, other.dtm) != value:
+                problems.append(f"{name}: {_fen(variant, side)} probes "
+                                f"{None if other is None else (other.wdl, other.dtm)}, "
+                                f"its reflection {fen} {value}")
+                break
+    return problems
+
+
+def self_check(names=SELF_CHECK_TABLES, workers: int | None = None,
+               samples: int = SELF_CHECK_SAMPLES) -> list[str]:
+    """Build the named tables in a temporary directory and check them: the longest mate must be the
+    known one (LONGEST_MATE), and random positions must probe alike in all their reflections and
+    agree with the values one move on.
+
+    Returns a description of every failure; an empty list means the tables are sound.
+    """
+    problems = []
+    rnd = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        reports = build(directory, names, workers)
+        for report in reports:
+            name = report["table"]
+            if report["longest_mate"] != LONGEST_MATE[name]:
+                problems.append(f"{name}: longest mate {report['longest_mate']} moves, "
+                                f"expected {LONGEST_MATE[name]}")
+        tablebase = Tablebase(directory)
+        try:
+            for report in reports:
+                problems += _check_probes(tablebase, report["table"], samples, rnd)
+        finally:
+            tablebase.close()
+            _close_subtables(directory)
+    return problems
+
+
+def _close_subtables(directory):
+    for key in [key for key in _opened if key[0] == directory]:
+        _opened.pop(key).close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or probe endgame tablebases.")
+    parser.add_argument("--self-check", nargs="*", choices=list(TABLES), metavar="TABLE", default=None,
+                        help="build the named tables (default: " + " ".join(SELF_CHECK_TABLES)
+                             + ") in a temporary directory, check them and exit")
+    commands = parser.add_subparsers(dest="command")
+    build_cmd = commands.add_parser("build", help="generate tables into a directory")
+    build_cmd.add_argument("directory")
+    build_cmd.add_argument("--tables", nargs="+", choices=list(TABLES), default=None)
+    build_cmd.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    probe_cmd = commands.add_parser("probe", help="probe a position")
+    probe_cmd.add_argument("directory")
+    probe_cmd.add_argument("fen")
+    args = parser.parse_args(argv)
+
+    if args.self_check is not None:
+        names = args.self_check or SELF_CHECK_TABLES
+        problems = self_check(names)
+        for problem in problems:
+            print(problem)
+        print(f"self-check: {len(problems)} problems ({' '.join(names)})")
+        return 1 if problems else 0
+    if args.command is None:
+        parser.error("a command is required")
+    if args.command == "build":
+        build(args.directory, args.tables, args.workers, out=sys.stdout)
+        return 0
+
+    from chess.board import Board
+    from chess.perft import move_to_uci
+
+    board = Board(backend="bitboard")
+    from_fen(board, args.fen)
+    tablebase = Tablebase(args.directory)
+    result = tablebase.probe(board)
+    if result is None:
+        print("not in the tablebase")
+        return 1
+    outcome = {1: "win", 0: "draw", -1: "loss"}[result.wdl]
+    move = tablebase.best_move(board)
+    print(f"{outcome}" + (f", mate in {result.dtm} plies" if result.wdl else "")
+          + (f", best move {move_to_uci(move)}" if move is not None else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from array import array
+
+from chess.move import decode_move
+
+# Transposition table keyed on Board.zobrist_key, held in preallocated flat arrays rather than a
+# dict of tuples. Entries sit in two-slot buckets: slot 0 keeps the deepest recent result for its
+# bucket, slot 1 always takes whatever slot 0 turned away. Entries written by an earlier search
+# (a different age) lose to anything from the current one.
+
+EXACT = 0
+LOWER = 1  # fail high: score is a lower bound
+UPPER = 2  # fail low: score is an upper bound
+
+# meta packs depth + 1 (0 marks an empty slot), bound and age into 16 bits
+_BOUND_SHIFT = 8
+_AGE_SHIFT = 10
+_AGE_MASK = 0x3F
+
+ENTRY_BYTES = 8 + 4 + 4 + 2  # key, move, score, meta
+
+
+class TranspositionTable:
+    def __init__(self, size_mb: float = 16):
+        entries = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.buckets = entries // 2
+        entries = self.buckets * 2
+
+        self.keys = array('Q', [0]) * entries
+        self.moves = array('I', [0]) * entries
+        self.scores = array('i', [0]) * entries
+        self.meta = array('H', [0]) * entries
+
+        self.age = 0
+
+        # statistics, reset by new_search()
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0  # probes that found the bucket occupied by other positions only
+        self.stores = 0
+        self.overwrites = 0  # stores that evicted a different, current-age position
+
+    @property
+    def size_mb(self) -> float:
+        return len(self.keys) * ENTRY_BYTES / (1024 * 1024)
+
+    def clear(self):
+        n = len(self.keys)
+        self.keys = array('Q', [0]) * n
+        self.moves = array('I', [0]) * n
+        self.scores = array('i', [0]) * n
+        self.meta = array('H', [0]) * n
+        self.age = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = self.hits = self.collisions = self.stores = self.overwrites = 0
+
+    def new_search(self):
+        # age out the previous search's entries: they stay probeable but are replaced first
+        self.age = (self.age + 1) & _AGE_MASK
+        self.reset_stats()
+
+    def probe(self, key: int):
+        """Return (depth, bound, score, move) for key, or None. move is packed, 0 if none."""
+        self.probes += 1
+        i = (key % self.buckets) * 2
+        keys, meta = self.keys, self.meta
+        for slot in (i, i + 1):
+            if keys[slot] == key and meta[slot]:
+                self.hits += 1
+                m = meta[slot]
+                return ((m & 0xFF) - 1, (m >> _BOUND_SHIFT) & 0x3, self.scores[slot], self.moves[slot])
+        if meta[i] or meta[i + 1]:
+            self.collisions += 1
+        return None
+
+    def probe_move(self, key: int) -> int:
+        # packed hash move for key, 0 if none
+        entry = self.probe(key)
+        return entry[3] if entry else 0
+
+    def hash_move(self, board):
+        # the stored best move for the board's position as a Move, for legal_moves callers
+        packed = self.probe_move(board.zobrist_key)
+        return decode_move(packed) if packed else None
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: int = 0):
+        self.stores += 1
+        i = (key % self.buckets) * 2
+        keys, meta = self.keys, self.meta
+        new_meta = min(depth + 1, 0xFF) | (bound << _BOUND_SHIFT) | (self.age << _AGE_SHIFT)
+
+        # same position already in the bucket: update it in place, keeping its hash move if the
+        # new result has none
+        for slot in (i, i + 1):
+            if keys[slot] == key and meta[slot]:
+                if move == 0:
+                    move = self.moves[slot]
+                self._write(slot, key, move, score, new_meta)
+                return
+
+        old = meta[i]
+        stale = ((old >> _AGE_SHIFT) & _AGE_MASK) != self.age
+        if not old or stale or (old & 0xFF) <= depth + 1:
+            # depth-preferred slot taken over; a current occupant drops to the always-replace slot
+            if old and not stale:
+                self._count_eviction(i + 1)
+                self._write(i + 1, keys[i], self.moves[i], self.scores[i], old)
+            self._write(i, key, move, score, new_meta)
+        else:
+            self._count_eviction(i + 1)
+            self._write(i + 1, key, move, score, new_meta)
+
+    def _count_eviction(self, slot):
+        m = self.meta[slot]
+        if m and ((m >> _AGE_SHIFT) & _AGE_MASK) == self.age:
+            self.overwrites += 1
+
+    def _write(self, slot, key, move, score, meta):
+        self.keys[slot] = key
+        self.moves[slot] = move
+        self.scores[slot] = score
+        self.meta[slot] = meta
+
+    def stats(self) -> dict:
+        used = sum(1 for m in self.meta if m)
+        return {
+            "size_mb": round(self.size_mb, 2),
+            "entries": len(self.keys),
+            "used": used,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
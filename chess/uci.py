@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+
+from chess import instrument
+from chess.board import Board
+from chess.fen import to_fen
+from chess.perft import move_to_uci
+from chess.search import Searcher, DepthInfo, MATE, is_mate_score
+from chess.transposition import TranspositionTable
+
+# UCI front end: python -m chess.uci
+#
+# Commands are read on the main thread; `go` hands the search to a worker thread so `stop`,
+# `isready` and `quit` are answered while it runs. Commands that change the position (`position`,
+# `ucinewgame`, `setoption`, another `go`) stop and join any running search first, since the
+# worker makes and unmakes moves on the engine's board; `d` leaves it running and prints the
+# position it started from.
+#
+# `debug on` times the rules engine during each search (chess.instrument) and reports the busiest
+# functions as info strings before bestmove.
+
+ENGINE_NAME = "python_chess"
+ENGINE_AUTHOR = "TaunterMan"
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+DEFAULT_HASH_MB = 16
+DEFAULT_MOVES_TO_GO = 30
+MOVE_OVERHEAD = 0.05  # seconds kept back for I/O and GUI lag
+DEBUG_REPORT_ROWS = 8
+
+
+def format_score(score: int) -> str:
+    # "cp 35", or "mate 3" / "mate -2" in moves (not plies) from the side to move
+    if is_mate_score(score):
+        plies = MATE - abs(score)
+        moves = (plies + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {score}"
+
+
+def format_info(info: DepthInfo) -> str:
+    return (f"info depth {info.depth} score {format_score(info.score)} nodes {info.nodes} "
+            f"nps {info.nps} time {int(info.seconds * 1000)} "
+            f"pv {' '.join(move_to_uci(m) for m in info.pv)}")
+
+
+def parse_uci_move(board, text: str):
+    # the legal Move matching a UCI string such as e2e4 or a7a8q
+    text = text.strip().lower()
+    for move in board.legal_moves():
+        if move_to_uci(move) == text:
+            return move
+    raise ValueError(f"illegal move {text!r}")
+
+
+def allot_time(white: bool, params: dict) -> float | None:
+    # seconds to spend on this move from go wtime/btime/winc/binc/movestogo, or None if untimed
+    remaining = params.get("wtime" if white else "btime")
+    if remaining is None:
+        return None
+    increment = params.get("winc" if white else "binc", 0)
+    moves_to_go = params.get("movestogo") or DEFAULT_MOVES_TO_GO
+    budget = remaining / moves_to_go + increment * 0.8
+    return max(0.01, min(budget, remaining - MOVE_OVERHEAD * 1000) / 1000)
+
+
+class UciEngine:
+    def __init__(self, out=None, backend: str = "bitboard"):
+        self.out = out or sys.stdout
+        self.backend = backend
+        self.hash_mb = DEFAULT_HASH_MB
+        self.tt = TranspositionTable(self.hash_mb)
+        self.board = Board(backend=backend)
+        self.debug = False
+
+        self._searcher: Searcher | None = None
+        self._thread: threading.Thread | None = None
+        self._search_fen = None  # the position the running search started from, for `d`
+        self._stop_requested = threading.Event()  # ends `go infinite` waiting for stop
+        self._write_lock = threading.Lock()
+
+    def send(self, line: str):
+        # called from both threads
+        with self._write_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def handle(self, line: str) -> bool:
+        """Run one command line. Returns False once the engine should exit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max 4096")
+            self.send(f"option name Backend type combo default {self.backend} "
+                      + " ".join(f"var {name}" for name in Board.BACKENDS))
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "debug":
+            self.debug = args[:1] == ["on"]
+        elif command == "setoption":
+            self.stop()
+            self._set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            self.tt.clear()
+            self.board = Board(backend=self.backend)
+        elif command == "position":
+            self.stop()
+            self._position(args)
+        elif command == "go":
+            self.stop()
+            self._go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        elif command == "d":  # not UCI: show the position, as many engines do
+            # a running search is making moves on the board: show where it started, and let it run
+            self.send(self._search_fen if self._thread is not None else to_fen(self.board))
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def _set_option(self, args):
+        # setoption name <id> value <x>
+        if "name" not in args:
+            return
+        value_at = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[args.index("name") + 1:value_at]).lower()
+        value = " ".join(args[value_at + 1:])
+        if name == "hash":
+            if not value.isdigit():
+                self.send(f"info string bad Hash value {value!r}")
+                return
+            self.hash_mb = max(1, int(value))
+            self.tt = TranspositionTable(self.hash_mb)
+        elif name == "backend" and value in Board.BACKENDS:
+            self.backend = value
+            self.board = Board(backend=value)
+        else:
+            self.send(f"info string unknown option {name}")
+
+    def _position(self, args):
+        # position startpos|fen <6 fields> [moves m1 m2 ...]
+        if not args:
+            return
+        moves_at = args.index("moves") if "moves" in args else len(args)
+        if args[0] == "startpos":
+            fen = START_FEN
+        elif args[0] == "fen":
+            fen = " ".join(args[1:moves_at])
+        else:
+            self.send("info string bad position command")
+            return
+
+        try:
+            board = Board.from_fen(fen, self.backend)
+            for text in args[moves_at + 1:]:
+                board.make_move(parse_uci_move(board, text))
+        except ValueError as e:
+            self.send(f"info string {e}")
+            return
+        self.board = board
+
+    def _go(self, args):
+        params = {}
+        infinite = False
+        i = 0
+        while i < len(args):
+            name = args[i]
+            if name == "infinite":
+                infinite = True
+            elif name in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo"):
+                # a missing or non-numeric value is reported and the parameter ignored
+                try:
+                    params[name] = int(args[i + 1])
+                    i += 1
+                except (IndexError, ValueError):
+                    self.send(f"info string go: bad value for {name}")
+            i += 1
+
+        depth = params.get("depth")
+        if depth is not None and depth < 1:
+            # the searcher reads depth 0 as no limit at all
+            self.send(f"info string go: depth {depth} searched as depth 1")
+            depth = 1
+        nodes = params.get("nodes")
+        if "movetime" in params:
+            movetime = params["movetime"] / 1000
+        else:
+            movetime = allot_time(self.board.white_to_move, params)
+        if infinite:
+            depth = nodes = movetime = None
+
+        # played if the search fails before it has a move of its own
+        legal_moves = self.board.status().legal_moves
+        fallback = legal_moves[0] if legal_moves else None
+
+        self._stop_requested.clear()
+        self._search_fen = to_fen(self.board)
+        self._searcher = Searcher(self.board, lambda info: self.send(format_info(info)), self.tt)
+        self._thread = threading.Thread(target=self._search, args=(depth, nodes, movetime, infinite, fallback),
+                                        daemon=True)
+        self._thread.start()
+
+    def _search(self, depth, nodes, movetime, infinite, fallback):
+        # always ends with bestmove, whatever the search does, so the GUI is never left waiting
+        best_move, ponder = fallback, None
+        try:
+            if self.debug:
+                with instrument.profile() as prof:
+                    result = self._searcher.search(depth, nodes, movetime)
+                for line in prof.report(rows=DEBUG_REPORT_ROWS).splitlines():
+                    self.send(f"info string {line}")
+            else:
+                result = self._searcher.search(depth, nodes, movetime)
+            if result.best_move is not None:
+                best_move = result.best_move
+                ponder = result.pv[1] if len(result.pv) > 1 else None
+        except Exception as e:
+            self.send(f"info string search failed: {e!r}")
+        finally:
+            if infinite:
+                # UCI: bestmove only after stop, even when the search finished on its own
+                self._stop_requested.wait()
+            if best_move is None:
+                self.send("bestmove 0000")
+            else:
+                line = f"bestmove {move_to_uci(best_move)}"
+                if ponder is not None:
+                    line += f" ponder {move_to_uci(ponder)}"
+                self.send(line)
+
+    def stop(self):
+        if self._searcher is not None:
+            self._searcher.stop()
+        self._stop_requested.set()
+        self.wait()
+
+    def wait(self):
+        # let a running search finish (stop() first to cut it short)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="UCI engine on stdin/stdout.")
+    parser.add_argument("--backend", default="bitboard", choices=Board.BACKENDS)
+    args = parser.parse_args(argv)
+
+    engine = UciEngine(backend=args.backend)
+    for line in sys.stdin:
+        if not engine.handle(line.strip()):
+            break
+    engine.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from chess.fen import from_fen, to_fen, parse_placement, alg_to_rc
+
+# Batch FEN validation and normalization: python -m chess.validate IN OUT
+#
+# Lines are read in chunks; each chunk is one work unit for a process pool, and results are
+# written back in submission order with a bounded number of chunks in flight, so output order
+# matches input order and memory stays flat on very large files.
+#
+# A valid position is written as the FEN to_fen produces for it after from_fen: castling rights
+# (given in any order) reduced to those whose king and rook are still at home, in KQkq order, and
+# the en passant square only when a pawn can take (fen._ep_target_if_capturable). Invalid lines
+# are dropped from the output and counted by reason. Blank lines are skipped; rejects are
+# reported by their line number in the input.
+
+DEFAULT_CHUNK = 2000
+
+# rejection reasons
+FIELDS = "not 6 fields"
+PLACEMENT = "bad piece placement"
+SIDE = "bad side to move"
+CASTLING = "bad castling field"
+EN_PASSANT = "bad en passant square"
+CLOCKS = "bad move clocks"
+KINGS = "not exactly one king per side"
+BACK_RANK_PAWN = "pawn on the first or last rank"
+OPPONENT_IN_CHECK = "side not to move is in check"
+
+_CASTLING = re.compile(r"^(-|(?!.*(.).*\2)[KQkq]{1,4})$")  # no letter twice
+_EP = re.compile(r"^(-|[a-h][36])$")
+
+
+def validate_fen(fen: str, board) -> tuple[str | None, str | None]:
+    """(normalized FEN, None) for a valid position, else (None, reason). board is reused scratch."""
+    fields = fen.split()
+    if len(fields) != 6:
+        return None, FIELDS
+    placement, active, castling, ep, half, full = fields
+
+    try:
+        pieces = parse_placement(placement)
+    except ValueError:
+        return None, PLACEMENT
+    if active not in ("w", "b"):
+        return None, SIDE
+    if not castling or not _CASTLING.match(castling):
+        return None, CASTLING
+    if not half.isdigit() or not full.isdigit() or int(full) < 1:
+        return None, CLOCKS
+
+    symbols = Counter(symbol for _, symbol in pieces)
+    if symbols['K'] != 1 or symbols['k'] != 1:
+        return None, KINGS
+    if any(symbol in "Pp" and row in (0, 7) for (row, _), symbol in pieces):
+        return None, BACK_RANK_PAWN
+
+    if ep != "-":
+        # the square behind a pawn of the side not to move that has just double-pushed
+        if not _EP.match(ep) or (ep[1] == "6") != (active == "w"):
+            return None, EN_PASSANT
+        row, col = alg_to_rc(ep)
+        pushed = (row + 1, col) if active == "w" else (row - 1, col)
+        if (pushed, "p" if active == "w" else "P") not in pieces:
+            return None, EN_PASSANT
+
+    from_fen(board, fen)
+    if board.check(not board.white_to_move):
+        return None, OPPONENT_IN_CHECK
+    return to_fen(board, normalize_ep=True), None
+
+
+def _validate_chunk(lines: list[str], backend: str) -> list[tuple[str | None, str | None]]:
+    # worker task: one scratch board for the whole chunk
+    from chess.board import Board
+
+    board = Board(backend=backend)
+    return [validate_fen(line, board) for line in lines]
+
+
+def _chunks(lines, size):
+    # (input line numbers, stripped FENs) for up to size non-blank lines at a time
+    lines = ((number, line.strip()) for number, line in enumerate(lines, 1))
+    lines = ((number, line) for number, line in lines if line)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        numbers, fens = zip(*chunk)
+        yield numbers, list(fens)
+
+
+def validate_stream(lines, out, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK,
+                    backend: str = "bitboard", rejects=None, examples: int = 3) -> dict:
+    """Validate FEN lines, writing normalized FENs to out in input order.
+
+    rejects, if given, receives "line<TAB>reason<TAB>fen" for every rejected line, numbered by its
+    line in the input. Returns a report with the per-reason counts and the first few rejected line
+    numbers for each reason.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    reasons = Counter()
+    first = {}
+    total = accepted = 0
+
+    def drain(numbers, chunk, results):
+        nonlocal total, accepted
+        for number, fen, (normalized, reason) in zip(numbers, chunk, results):
+            total += 1
+            if reason is None:
+                accepted += 1
+                out.write(normalized + "\n")
+            else:
+                reasons[reason] += 1
+                seen = first.setdefault(reason, [])
+                if len(seen) < examples:
+                    seen.append(number)
+                if rejects is not None:
+                    rejects.write(f"{number}\t{reason}\t{fen}\n")
+
+    if workers == 1:
+        for numbers, chunk in _chunks(lines, chunk_size):
+            drain(numbers, chunk, _validate_chunk(chunk, backend))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for numbers, chunk in _chunks(lines, chunk_size):
+                pending.append((numbers, chunk, pool.submit(_validate_chunk, chunk, backend)))
+                if len(pending) >= 2 * workers:  # keep every worker busy without reading ahead
+                    numbers, chunk, future = pending.popleft()
+                    drain(numbers, chunk, future.result())
+            while pending:
+                numbers, chunk, future = pending.popleft()
+                drain(numbers, chunk, future.result())
+
+    seconds = time.perf_counter() - start
+    return {
+        "lines": total,
+        "accepted": accepted,
+        "rejected": total - accepted,
+        "reasons": {reason: {"count": count, "first_lines": first[reason]}
+                    for reason, count in reasons.most_common()},
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "lines_per_sec": round(total / seconds) if seconds > 0 else 0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Validate and normalize a file of FENs, one per line.")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="lines per work unit")
+    parser.add_argument("--backend", default="bitboard", choices=("objects", "bitboard"))
+    parser.add_argument("--rejects", default=None, help="write rejected lines with their reason here")
+    parser.add_argument("--json", dest="json_path", default=None, help="write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8", errors="replace") as src, \
+            open(args.output, "w", encoding="utf-8") as out:
+        rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+        try:
+            report = validate_stream(src, out, args.workers, args.chunk, args.backend, rejects)
+        finally:
+            if rejects is not None:
+                rejects.close()
+
+    print(f"{report['lines']} lines: {report['accepted']} accepted, {report['rejected']} rejected "
+          f"in {report['seconds']}s ({report['lines_per_sec']} lines/s, {report['workers']} workers)")
+    for reason, info in report["reasons"].items():
+        print(f"  {info['count']:>8}  {reason} (first at line {', '.join(map(str, info['first_lines']))})")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
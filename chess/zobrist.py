@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import random
+
+from chess.fen import _ep_target_if_capturable
+
+Square = tuple[int, int]  # (row, col)
+
+# Castling-right bits, in FEN order
+CASTLE_K = 1
+CASTLE_Q = 2
+CASTLE_k = 4
+CASTLE_q = 8
+
+# Fixed seed so keys are stable across runs and processes
+_rng = random.Random(0x5EED_C4E5)
+
+
+def _rand64() -> int:
+    return _rng.getrandbits(64)
+
+
+# one key per (piece symbol, square index); square index is row * 8 + col
+PIECE_KEYS: dict[str, list[int]] = {
+    sym: [_rand64() for _ in range(64)] for sym in "PNBRQKpnbrqk"
+}
+SIDE_KEY = _rand64()  # XORed in when black is to move
+CASTLE_KEYS = [_rand64() for _ in range(16)]  # indexed by castling-right bitmask
+EP_KEYS = [_rand64() for _ in range(8)]  # indexed by en-passant file
+
+
+def piece_key(symbol: str, square: Square) -> int:
+    r, c = square
+    return PIECE_KEYS[symbol][r * 8 + c]
+
+
+def castling_rights(board) -> int:
+    # Same derivation as fen._castling_rights_string, as a KQkq bitmask
+    rights = 0
+
+    wk = getattr(board, "white_king", None)
+    if wk and getattr(wk, "times_moved", 1) == 0 and board.get_piece((7, 4)) is wk:
+        rh1 = board.get_piece((7, 7))
+        ra1 = board.get_piece((7, 0))
+        if rh1 and rh1.white and getattr(rh1, "times_moved", 1) == 0:
+            rights |= CASTLE_K
+        if ra1 and ra1.white and getattr(ra1, "times_moved", 1) == 0:
+            rights |= CASTLE_Q
+
+    bk = getattr(board, "black_king", None)
+    if bk and getattr(bk, "times_moved", 1) == 0 and board.get_piece((0, 4)) is bk:
+        rh8 = board.get_piece((0, 7))
+        ra8 = board.get_piece((0, 0))
+        if rh8 and (not rh8.white) and getattr(rh8, "times_moved", 1) == 0:
+            rights |= CASTLE_k
+        if ra8 and (not ra8.white) and getattr(ra8, "times_moved", 1) == 0:
+            rights |= CASTLE_q
+
+    return rights
+
+
+def ep_file(board) -> int | None:
+    # En-passant file, only when the capture is available (matches fen_key normalization)
+    ep = _ep_target_if_capturable(board)
+    return None if ep is None else ep[1]
+
+
+def compute_key(board) -> int:
+    # Full from-scratch key; Board keeps its key in sync incrementally
+    key = 0
+    for r in range(8):
+        for c in range(8):
+            p = board.get_piece((r, c))
+            if p is not None:
+                key ^= PIECE_KEYS[p.symbol][r * 8 + c]
+
+    if not getattr(board, "white_to_move", True):
+        key ^= SIDE_KEY
+
+    key ^= CASTLE_KEYS[castling_rights(board)]
+
+    f = ep_file(board)
+    if f is not None:
+        key ^= EP_KEYS[f]
+
+    return key